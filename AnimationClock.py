@@ -0,0 +1,252 @@
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import shiboken6
+from PySide6.QtCore import QEasingCurve, QElapsedTimer, QMetaObject, QObject, QRect, Qt, QTimer
+from PySide6.QtWidgets import QWidget
+
+# apply(value) sets the animated properties and may return the damaged rect,
+# None repaints the whole widget
+Apply = Callable[[float], Optional[QRect]]
+
+# on_event(index, elapsed) for a timeline event crossed at elapsed milliseconds
+OnEvent = Callable[[int, float], None]
+
+
+class Timeline:
+    """
+    A value animated from start_value to end_value over duration
+    milliseconds, like a QVariantAnimation, but advanced by an AnimationClock
+    instead of its own timer. loop_count -1 loops forever.
+
+    events are times within a loop, in milliseconds from 0 up to but not
+    including duration, kept sorted. On every tick on_event is called with
+    the index and time of each event the timeline went past since the
+    previous tick, in order and once per loop, however many late ticks
+    skipped.
+    """
+
+    def __init__(self, widget: QWidget, duration: float, apply: Apply,
+                 start_value: float = 0.0, end_value: float = 1.0,
+                 easing: Optional[QEasingCurve] = None, loop_count: int = 1,
+                 finished: Optional[Callable[[], None]] = None,
+                 events: Sequence[float] = (), on_event: Optional[OnEvent] = None) -> None:
+        if duration <= 0:
+            raise ValueError("Timeline duration must be positive.")
+        self.widget = widget
+        self.duration = duration
+        self.apply = apply
+        self.start_value = start_value
+        self.end_value = end_value
+        self.easing = easing
+        self.loop_count = loop_count
+        self.finished = finished
+        if any(not 0 <= event < duration for event in events):
+            raise ValueError("Timeline events must be within one loop.")
+        self.events = sorted(events)
+        self.on_event = on_event
+        self.start_time: Optional[float] = None
+        self.paused_time: Optional[float] = None
+        # elapsed time at the last tick, events up to it have been fired
+        self.last_elapsed: Optional[float] = None
+
+    def elapsed(self, now: float) -> float:
+        return (self.paused_time if self.paused_time is not None else now) - self.start_time
+
+    def is_done(self, now: float) -> bool:
+        return self.is_done_after(self.elapsed(now))
+
+    def is_done_after(self, elapsed: float) -> bool:
+        return self.loop_count >= 0 and elapsed >= self.duration * self.loop_count
+
+    def crossed_events(self, elapsed: float) -> List[Tuple[int, float]]:
+        """(index, elapsed) of the events after last_elapsed and up to elapsed."""
+        if not self.events or (self.last_elapsed is not None and elapsed <= self.last_elapsed):
+            return []
+        if self.loop_count >= 0:
+            # the end of the last loop is not the start of another
+            elapsed = min(elapsed, math.nextafter(self.duration * self.loop_count, 0))
+        if self.last_elapsed is None:
+            # nothing fired yet, events at 0 are due
+            after, loop = -math.inf, 0
+        else:
+            after, loop = self.last_elapsed, max(0, math.floor(self.last_elapsed / self.duration))
+        crossed = []
+        while loop * self.duration <= elapsed:
+            for index, event in enumerate(self.events):
+                time = loop * self.duration + event
+                if after < time <= elapsed:
+                    crossed.append((index, time))
+            loop += 1
+        return crossed
+
+    def value_at(self, now: float) -> float:
+        return self.value_after(self.elapsed(now))
+
+    def value_after(self, elapsed: float) -> float:
+        if self.is_done_after(elapsed):
+            progress = 1.0
+        else:
+            progress = elapsed % self.duration / self.duration
+        if self.easing is not None:
+            progress = self.easing.valueForProgress(progress)
+        return self.start_value + (self.end_value - self.start_value) * progress
+
+
+class AnimationClock(QObject):
+    """
+    One timer for every animated widget of the process. Each tick evaluates
+    all registered timelines against the same timestamp, then requests at
+    most one update() per widget, for the union of the rects its timelines
+    reported. The timer only runs while there are timelines to advance.
+
+    time_source returns the current time in milliseconds; pass one to drive
+    the clock from a test, and call tick() directly instead of running the
+    event loop.
+    """
+
+    def __init__(self, frame_rate: float = 60, time_source: Optional[Callable[[], float]] = None) -> None:
+        super().__init__()
+        self.timelines: List[Timeline] = []
+        # ids of widgets whose timelines are held, see suspend_widget, with the
+        # connection that forgets the id when the widget is destroyed first
+        self.suspended_widgets: Dict[int, QMetaObject.Connection] = {}
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+        self.set_frame_rate(frame_rate)
+        self.elapsed_timer = QElapsedTimer()
+        self.elapsed_timer.start()
+        self.time_source = self.elapsed_timer.elapsed if time_source is None else time_source
+        self.ticks = 0
+        self.evaluations = 0
+        self.updates = 0
+
+    def set_frame_rate(self, frame_rate: float) -> None:
+        if frame_rate <= 0:
+            raise ValueError("Frame rate must be positive.")
+        self.frame_rate = frame_rate
+        self.timer.setInterval(max(1, round(1000 / frame_rate)))
+
+    def now(self) -> float:
+        return float(self.time_source())
+
+    def add(self, timeline: Timeline) -> Timeline:
+        timeline.start_time = self.now()
+        # a timeline started on a suspended widget waits for it to come back
+        timeline.paused_time = timeline.start_time if id(timeline.widget) in self.suspended_widgets else None
+        self.timelines.append(timeline)
+        self.update_timer()
+        return timeline
+
+    def start(self, widget: QWidget, duration: float, apply: Apply, **kwargs) -> Timeline:
+        """Create a Timeline (see its arguments) and start it now."""
+        return self.add(Timeline(widget, duration, apply, **kwargs))
+
+    def remove(self, timeline: Timeline) -> None:
+        if timeline in self.timelines:
+            self.timelines.remove(timeline)
+        self.update_timer()
+
+    def update_timer(self) -> None:
+        """Run the timer only while some timeline is playing, so paused widgets do not wake the event loop."""
+        if any(timeline.paused_time is None for timeline in self.timelines):
+            if not self.timer.isActive():
+                self.timer.start()
+        else:
+            self.timer.stop()
+
+    def pause(self, timeline: Timeline) -> None:
+        if timeline.paused_time is None:
+            timeline.paused_time = self.now()
+        self.update_timer()
+
+    def resume(self, timeline: Timeline) -> None:
+        if timeline.paused_time is not None:
+            # shift the start so the timeline continues where it was paused
+            timeline.start_time += self.now() - timeline.paused_time
+            timeline.paused_time = None
+        self.update_timer()
+
+    def widget_timelines(self, widget: QWidget) -> List[Timeline]:
+        return [timeline for timeline in self.timelines if timeline.widget is widget]
+
+    def suspend_widget(self, widget: QWidget) -> List[Timeline]:
+        """Pause every playing timeline of widget, and the ones started until resume_widget."""
+        key = id(widget)
+        if key not in self.suspended_widgets:
+            self.suspended_widgets[key] = widget.destroyed.connect(lambda: self.suspended_widgets.pop(key, None))
+        paused = [timeline for timeline in self.widget_timelines(widget) if timeline.paused_time is None]
+        for timeline in paused:
+            self.pause(timeline)
+        return paused
+
+    def resume_widget(self, widget: QWidget) -> None:
+        connection = self.suspended_widgets.pop(id(widget), None)
+        if connection is not None:
+            QObject.disconnect(connection)
+        for timeline in self.widget_timelines(widget):
+            self.resume(timeline)
+
+    def tick(self, now: Optional[float] = None) -> None:
+        now = self.now() if now is None else now
+        # widget id -> [widget, damaged rect], None for the whole widget
+        damage: Dict[int, List] = {}
+        finished = []
+        evaluations = 0
+        is_valid = shiboken6.isValid
+        for timeline in list(self.timelines):
+            widget = timeline.widget
+            if not is_valid(widget):
+                self.remove(timeline)
+                continue
+            if timeline.paused_time is not None:
+                continue
+            elapsed = now - timeline.start_time
+            if timeline.on_event is not None:
+                for index, time in timeline.crossed_events(elapsed):
+                    timeline.on_event(index, time)
+            timeline.last_elapsed = elapsed
+            done = timeline.is_done_after(elapsed)
+            if done or timeline.easing is not None or timeline.start_value != 0 \
+                    or timeline.end_value != timeline.duration:
+                value = timeline.value_after(elapsed)
+            else:
+                # the common timeline whose value is its time within the loop
+                value = elapsed % timeline.duration
+            rect = timeline.apply(value)
+            evaluations += 1
+            widget_damage = damage.get(id(widget))
+            if widget_damage is None:
+                damage[id(widget)] = [widget, rect]
+            # None means the whole widget, and stays so for this tick
+            elif rect is None or widget_damage[1] is None:
+                widget_damage[1] = None
+            else:
+                widget_damage[1] = widget_damage[1].united(rect)
+            if done:
+                finished.append(timeline)
+        self.evaluations += evaluations
+
+        for widget, rect in damage.values():
+            if rect is None:
+                widget.update()
+            elif rect.isEmpty():
+                continue
+            else:
+                widget.update(rect)
+            self.updates += 1
+        self.ticks += 1
+
+        for timeline in finished:
+            self.remove(timeline)
+            if timeline.finished is not None:
+                timeline.finished()
+
+    def stats(self) -> Dict[str, int]:
+        return {"timelines": len(self.timelines), "ticks": self.ticks,
+                "evaluations": self.evaluations, "updates": self.updates}
+
+
+# Shared by widgets so all animations advance on the same tick
+animation_clock = AnimationClock()
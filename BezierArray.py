@@ -0,0 +1,106 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+
+# 8-point Gauss-Legendre nodes and weights mapped to [0, 1]
+_nodes, _weights = np.polynomial.legendre.leggauss(8)
+GAUSS_LEGENDRE_NODES = (_nodes + 1) / 2
+GAUSS_LEGENDRE_WEIGHTS = _weights / 2
+
+
+class BezierArray:
+    """
+    A batch of cubic beziers stored as one (N, 4, 2) array of control points.
+    Evaluation, splitting and measuring work on every curve at once, with the
+    curve parameter given either as a scalar, one value per curve (N,) or
+    several values per curve (N, K).
+    """
+
+    def __init__(self, controls: np.ndarray) -> None:
+        self.controls = np.asarray(controls, dtype=np.float64).reshape(-1, 4, 2)
+
+    @staticmethod
+    def from_segments(segments: Sequence[Tuple[float, ...]]) -> "BezierArray":
+        """
+        Build from segments given as (x0, y0, x1, y1) lines or
+        (x0, y0, ..., x3, y3) cubics. Lines are degree-elevated to cubics.
+        """
+        controls = np.empty((len(segments), 4, 2))
+        for index, points in enumerate(segments):
+            if len(points) == 4:
+                x0, y0, x1, y1 = points
+                dx, dy = (x1 - x0) / 3, (y1 - y0) / 3
+                points = (x0, y0, x0 + dx, y0 + dy, x1 - dx, y1 - dy, x1, y1)
+            controls[index] = np.reshape(points, (4, 2))
+        return BezierArray(controls)
+
+    def __len__(self) -> int:
+        return len(self.controls)
+
+    def __getitem__(self, rows) -> "BezierArray":
+        return BezierArray(self.controls[rows])
+
+    def parameters(self, t) -> Tuple[np.ndarray, Tuple[np.ndarray, ...]]:
+        """Broadcast t against the curves; returns t and the four control points ready for arithmetic."""
+        t = np.asarray(t, dtype=np.float64)
+        if t.ndim == 0:
+            t = np.full(len(self), float(t))
+        points = tuple(self.controls[:, k] for k in range(4))
+        if t.ndim == 2:
+            points = tuple(p[:, None] for p in points)
+        return t[..., None], points
+
+    def evaluate(self, t) -> np.ndarray:
+        t, (p0, p1, p2, p3) = self.parameters(t)
+        mt = 1 - t
+        return mt ** 3 * p0 + 3 * mt ** 2 * t * p1 + 3 * mt * t ** 2 * p2 + t ** 3 * p3
+
+    def derivative(self, t) -> np.ndarray:
+        t, (p0, p1, p2, p3) = self.parameters(t)
+        mt = 1 - t
+        return 3 * (mt ** 2 * (p1 - p0) + 2 * mt * t * (p2 - p1) + t ** 2 * (p3 - p2))
+
+    def sample(self, count: int) -> np.ndarray:
+        """(N, count, 2) points at evenly spaced parameters, both ends included."""
+        return self.evaluate(np.broadcast_to(np.linspace(0.0, 1.0, count), (len(self), count)))
+
+    def lengths(self, intervals: int = 1) -> np.ndarray:
+        """
+        Arc length of every curve: 8-point Gauss-Legendre on each of intervals
+        equal parameter ranges. More intervals help curves with sharp turns.
+        """
+        starts = np.arange(intervals) / intervals
+        t = (starts[:, None] + GAUSS_LEGENDRE_NODES[None] / intervals).ravel()
+        weights = np.tile(GAUSS_LEGENDRE_WEIGHTS, intervals) / intervals
+        speeds = np.hypot(*np.moveaxis(self.derivative(np.broadcast_to(t, (len(self), len(t)))), -1, 0))
+        return speeds @ weights
+
+    def split(self, t) -> Tuple["BezierArray", "BezierArray"]:
+        """De Casteljau split of every curve at its own parameter."""
+        t, (p0, p1, p2, p3) = self.parameters(t)
+        if t.ndim != 2:
+            raise ValueError("split takes one parameter per curve.")
+        r0, r1, r2 = p0 + (p1 - p0) * t, p1 + (p2 - p1) * t, p2 + (p3 - p2) * t
+        s0, s1 = r0 + (r1 - r0) * t, r1 + (r2 - r1) * t
+        middle = s0 + (s1 - s0) * t
+        return (BezierArray(np.stack((p0, r0, s0, middle), axis=1)),
+                BezierArray(np.stack((middle, s1, r2, p3), axis=1)))
+
+    def segment(self, t0, t1) -> "BezierArray":
+        """The part of every curve between its own parameters t0 and t1."""
+        t0 = np.broadcast_to(np.asarray(t0, dtype=np.float64), (len(self),))
+        t1 = np.broadcast_to(np.asarray(t1, dtype=np.float64), (len(self),))
+        left = self.split(t1)[0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = np.where(t1 > 0.0, t0 / t1, 0.0)
+        return left.split(u)[1]
+
+    def chords(self, tolerance: float) -> np.ndarray:
+        """Wang's formula: number of chords keeping each curve within tolerance."""
+        p0, p1, p2, p3 = (self.controls[:, k] for k in range(4))
+        second_differences = np.maximum(np.hypot(*(p0 - 2 * p1 + p2).T), np.hypot(*(p1 - 2 * p2 + p3).T))
+        return np.maximum(np.ceil(np.sqrt(.75 * second_differences / tolerance)), 1).astype(np.intp)
+
+    def to_tuples(self):
+        """Curves as (x0, y0, ..., x3, y3) tuples, for building QPainterPaths."""
+        return [tuple(row) for row in self.controls.reshape(-1, 8).tolist()]
@@ -4,85 +4,165 @@
 # All rights reserved.
 #
 # ///////////////////////////////////////////////////////////////
+import inspect
 from typing import Optional
 
-from PySide6.QtCore import QPointF, Qt, QVariantAnimation, QTimer
-from PySide6.QtGui import QPaintEvent, QPainter, QColor, QPainterPath, QPen
+import numpy as np
+from PySide6.QtCore import Qt, QRect, QRectF
+from PySide6.QtGui import QPaintEvent, QPainter, QColor, QPen, QPixmap
 from PySide6.QtWidgets import QWidget
 
-from TrimmablePainterPath import TrimmablePainterPath
+from AnimationClock import animation_clock
+from Polylines import polygon_from_array
+from SpriteCache import SpriteAtlas, source_hash, sprite_cache
+from SvgPathImporter import SvgPathImporter, svg_path_importer
+from TrimmablePainterPath import FlattenedPainterPath, IncrementalTrimmer, TrimCache, TrimmablePainterPath
+from VisibilityGuard import VisibilityGuard
+
+# saved sprite atlases are only reused while this file and the modules
+# parsing, trimming and flattening its path are unchanged
+SOURCE_HASH = source_hash(__file__, inspect.getfile(TrimmablePainterPath), inspect.getfile(SvgPathImporter),
+                          inspect.getfile(polygon_from_array))
+
+GITHUB_PATH_DATA = (
+    "M 243.77 483.38"
+    # right leg
+    " L 243.77 441.77"
+    " L 243.79 441.46"
+    " C 244.53 431 240.68 420.73 233.25 413.32"
+    # right arc
+    " C 267.46 409.95 303 397.16 303 338.47"
+    " C 303 323.32 297.11 308.76 286.56 297.86"
+    # right ear
+    " C 291.84 284.47 291.33 269.84 285.57 256.94"
+    " M 285.88 257.63"
+    " C 285.88 257.63 273.17 253.87 243.77 273.54"
+    # top head
+    " L 243.37 273.43"
+    " C 218.94 266.9 193.21 266.9 168.78 273.43"
+    # left ear
+    " C 138.98 253.87 126.28 257.63 126.28 257.63"
+    " C 120.67 270.81 120.42 285.45 125.49 298.63"
+    # left arc
+    " C 115.05 308.76 109.15 323.33 109.15 338.48"
+    " C 109.15 397.06 144.69 409.85 178.51 414.04"
+    # left leg
+    " L 178.48 414.07"
+    " C 171.34 421.45 167.67 431.52 168.38 441.76"
+    " L 168.38 483.38"
+    # tail
+    " M 166 451.13"
+    " C 114.54 467.25 114.54 424.25 93 418.88"
+)
 
 
 class GitHubAnimation(QWidget):
-    def __init__(self, parent: Optional[QWidget] = None) -> None:
+    def __init__(self, parent: Optional[QWidget] = None, polyline: bool = False,
+                 sprite: bool = False, sprite_frame_rate: float = 30) -> None:
         super().__init__(parent)
         self.setFixedSize(500, 500)
-        self.github_path = self.create_github_path()
+        # parsed and measured once, then shared by every GitHubAnimation
+        self.prepared_github_path = svg_path_importer.prepare(GITHUB_PATH_DATA)
+        self.github_path = self.prepared_github_path.path
         self.github_path_rect = self.github_path.boundingRect()
+        # the highlight only moves forward, cache misses are trimmed incrementally
+        self.github_trimmer = IncrementalTrimmer(self.prepared_github_path)
+        # the animation replays the same 0 -> 150 range every period
+        self.trim_cache = TrimCache(max_size=512)
+        # draw the highlight as a flattened polyline instead of cubics
+        self.polyline = polyline
+        self.flattened_github_path: Optional[FlattenedPainterPath] = None
+        # blit pre-rendered frames of one period instead of stroking every frame
+        self.sprite = sprite
+        self.sprite_frame_rate = sprite_frame_rate
+        # the background path never changes, it is stroked once into a pixmap
+        self.background_layer: Optional[QPixmap] = None
+        # area covered by the highlight, only this changes between frames
+        self.highlight_rect = QRect()
         self.end_percentage = 0
+        # pause the animation while the logo cannot be seen
+        self.visibility_guard = VisibilityGuard(self)
+        self.timeline = None
         self.start_animation()
-        self.timer = QTimer()
-        self.timer.setInterval(3.5 * 1000)
-        self.timer.timeout.connect(self.start_animation)
-        self.timer.start()
-
-    def create_github_path(self) -> QPainterPath:
-        path = QPainterPath()
-        path.moveTo(QPointF(243.77, 483.38))
-
-        # right leg
-        path.lineTo(QPointF(243.77, 441.77))
-        path.lineTo(QPointF(243.79, 441.46))
-        path.cubicTo(QPointF(244.53, 431), QPointF(240.68, 420.73), QPointF(233.25, 413.32))
-
-        # right arc
-        path.cubicTo(QPointF(267.46, 409.95), QPointF(303, 397.16), QPointF(303, 338.47))
-        path.cubicTo(QPointF(303, 323.32), QPointF(297.11, 308.76), QPointF(286.56, 297.86))
-
-        # right ear
-        path.cubicTo(QPointF(291.84, 284.47), QPointF(291.33, 269.84), QPointF(285.57, 256.94))
-        path.moveTo(QPointF(285.88, 257.63))
-        path.cubicTo(QPointF(285.88, 257.63), QPointF(273.17, 253.87), QPointF(243.77, 273.54))
-
-        # top head
-        path.lineTo(QPointF(243.37, 273.43))
-        path.cubicTo(QPointF(218.94, 266.9), QPointF(193.21, 266.9), QPointF(168.78, 273.43))
-
-        # left ear
-        path.cubicTo(QPointF(138.98, 253.87), QPointF(126.28, 257.63), QPointF(126.28, 257.63))
-        path.cubicTo(QPointF(120.67, 270.81), QPointF(120.42, 285.45), QPointF(125.49, 298.63))
-
-        # left arc
-        path.cubicTo(QPointF(115.05, 308.76), QPointF(109.15, 323.33), QPointF(109.15, 338.48))
-        path.cubicTo(QPointF(109.15, 397.06), QPointF(144.69, 409.85), QPointF(178.51, 414.04))
-
-        # left leg
-        path.lineTo(QPointF(178.48, 414.07))
-        path.cubicTo(QPointF(171.34, 421.45), QPointF(167.67, 431.52), QPointF(168.38, 441.76))
-        path.lineTo(QPointF(168.38, 483.38))
-
-        # tail
-        path.moveTo(QPointF(166, 451.13))
-        path.cubicTo(QPointF(114.54, 467.25), QPointF(114.54, 424.25), QPointF(93, 418.88))
-
-        return path
 
     def start_animation(self) -> None:
-        animation = QVariantAnimation(self)
-        animation.setDuration(3 * 1000)
-        animation.valueChanged.connect(self.update_end_percentage)
-        animation.setStartValue(0)
-        animation.setEndValue(150)
-        animation.start()
-
-    def update_end_percentage(self, newValue) -> None:
-        self.end_percentage = newValue
-        self.update()
-
-    def paintEvent(self, event: QPaintEvent) -> None:
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-
+        # 0 -> 150 in 3 seconds, then a half second pause, forever
+        self.timeline = animation_clock.start(self, 3.5 * 1000, self.set_time,
+                                              end_value=3.5 * 1000, loop_count=-1)
+
+    def set_time(self, time: float) -> QRect:
+        return self.set_end_percentage(min(time / 20, 150))
+
+    def get_flattened_github_path(self) -> FlattenedPainterPath:
+        device_pixel_ratio = self.devicePixelRatioF()
+        if self.flattened_github_path is None or \
+                self.flattened_github_path.device_pixel_ratio != device_pixel_ratio:
+            self.flattened_github_path = TrimmablePainterPath.flatten(self.prepared_github_path, device_pixel_ratio)
+        return self.flattened_github_path
+
+    def get_background_layer(self) -> QPixmap:
+        device_pixel_ratio = self.devicePixelRatioF()
+        if self.background_layer is None or self.background_layer.devicePixelRatio() != device_pixel_ratio:
+            self.background_layer = QPixmap(self.size() * device_pixel_ratio)
+            self.background_layer.setDevicePixelRatio(device_pixel_ratio)
+            self.background_layer.fill(Qt.transparent)
+            painter = QPainter(self.background_layer)
+            painter.setRenderHint(QPainter.Antialiasing)
+            self.draw_background(painter)
+            painter.end()
+        return self.background_layer
+
+    @staticmethod
+    def get_trim_range(end_percentage: float):
+        return max(0, end_percentage/100-0.5), min(end_percentage/100, 1)
+
+    def get_highlight_rect(self, end_percentage: float) -> QRect:
+        _start, _end = self.get_trim_range(end_percentage)
+        if _start >= _end:
+            return QRect()
+        if self.polyline:
+            vertices = np.concatenate(self.get_flattened_github_path().trim_arrays(_start, _end))
+            (left, top), (right, bottom) = vertices.min(axis=0), vertices.max(axis=0)
+            rect = QRectF(left, top, right - left, bottom - top)
+        else:
+            # the same trim is drawn by paintEvent, which then hits the cache
+            rect = TrimmablePainterPath.trim(self.github_trimmer, _start, _end, self.trim_cache).controlPointRect()
+        # half the highlight pen plus a pixel of antialiasing
+        return rect.translated(self.get_translation()).adjusted(-5, -5, 5, 5).toAlignedRect()
+
+    def set_end_percentage(self, end_percentage: float) -> QRect:
+        self.end_percentage = end_percentage
+        previous_rect = self.highlight_rect
+        atlas = self.get_sprite_atlas() if self.sprite else None
+        if atlas is not None:
+            # the atlas blits the highlight of the frame time is in, not the exact one
+            end_percentage = atlas.frame_time(atlas.frame_index(end_percentage * 20)) / 20
+        self.highlight_rect = self.get_highlight_rect(end_percentage)
+        # repaint where the highlight was and where it is now
+        return previous_rect.united(self.highlight_rect)
+
+    def get_translation(self):
+        return self.rect().center().toPointF() - self.github_path_rect.center()
+
+    def get_sprite_bounds(self) -> QRectF:
+        # the largest pen is 8 wide, half of it falls outside the path
+        return self.github_path_rect.translated(self.get_translation()).adjusted(-5, -5, 5, 5)
+
+    def get_sprite_atlas(self) -> Optional[SpriteAtlas]:
+        # frame 0 and the held 150 % frame both show no highlight, so one period is 3 seconds
+        return sprite_cache.atlas(("GitHubAnimation", SOURCE_HASH, self.polyline),
+                                  self.get_sprite_bounds(), self.devicePixelRatioF(),
+                                  3 * 1000, self.sprite_frame_rate)
+
+    def paint_frame(self, painter: QPainter, time: float) -> None:
+        # the animation runs 0 -> 150 in 3 seconds, so 20 ms per percent
+        self.draw(painter, time / 20)
+
+    def draw(self, painter: QPainter, end_percentage: float) -> None:
+        self.draw_background(painter)
+        self.draw_highlight(painter, end_percentage)
+
+    def draw_background(self, painter: QPainter) -> None:
         pen = QPen()
         pen.setWidth(6)
         pen.setColor(QColor("#414141"))
@@ -90,18 +170,44 @@ class GitHubAnimation(QWidget):
         pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
         painter.setPen(pen)
 
-        translation = self.rect().center().toPointF() - self.github_path_rect.center()
-        painter.translate(translation)
-
-        # DRAW BACKGROUND
+        painter.save()
+        painter.translate(self.get_translation())
         painter.drawPath(self.github_path)
+        painter.restore()
 
-        # DRAW BLACK CIRCLE OR HORIZONTAL ROUNDED RECT
-        pen.setColor(QColor("white"))
+    def draw_highlight(self, painter: QPainter, end_percentage: float) -> None:
+        pen = QPen()
         pen.setWidth(8)
+        pen.setColor(QColor("white"))
+        pen.setCapStyle(Qt.RoundCap)
+        pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
         painter.setPen(pen)
-        _start = max(0, self.end_percentage/100-0.5)
-        _end = min(self.end_percentage/100, 1)
-        painter.drawPath(TrimmablePainterPath.trim(self.github_path, _start, _end))
+
+        painter.save()
+        painter.translate(self.get_translation())
+        _start, _end = self.get_trim_range(end_percentage)
+        if self.polyline:
+            for polygon in self.get_flattened_github_path().trim(_start, _end):
+                painter.drawPolyline(polygon)
+        else:
+            painter.drawPath(TrimmablePainterPath.trim(self.github_trimmer, _start, _end, self.trim_cache))
+        painter.restore()
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        atlas = self.get_sprite_atlas() if self.sprite else None
+        if atlas is not None:
+            atlas.draw(painter, self.end_percentage * 20, self.paint_frame)
+        else:
+            # only the damaged part of the cached background is copied
+            background_layer = self.get_background_layer()
+            ratio = background_layer.devicePixelRatio()
+            source = QRectF(event.rect())
+            painter.drawPixmap(source, background_layer,
+                               QRectF(source.x() * ratio, source.y() * ratio,
+                                      source.width() * ratio, source.height() * ratio))
+            self.draw_highlight(painter, self.end_percentage)
 
         painter.end()
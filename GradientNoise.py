@@ -0,0 +1,131 @@
+import numpy as np
+
+# Lattice points per axis before the gradients repeat
+LATTICE_SIZE = 256
+
+# Scale Perlin noise, at most sqrt(n)/2 in magnitude in n dimensions, to [-0.5, 0.5]
+NOISE_SCALE_2D = 1 / np.sqrt(2)
+NOISE_SCALE_3D = 1 / np.sqrt(3)
+
+
+def fade(t: np.ndarray) -> np.ndarray:
+    """Perlin's quintic interpolant 6t^5 - 15t^4 + 10t^3."""
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def lerp(a: np.ndarray, b: np.ndarray, t: np.ndarray) -> np.ndarray:
+    return a + (b - a) * t
+
+
+class GradientNoise:
+    """
+    2D and 3D Perlin gradient noise evaluated on whole NumPy arrays.
+    Coordinates are multiplied by frequency, and the result lies in
+    [-0.5, 0.5] and is 0 at every lattice point. Gradients and the hash
+    permutation are drawn from a NumPy generator seeded with seed, so equal
+    seeds give equal noise on every platform.
+
+    The lattice wraps every period points (at most LATTICE_SIZE), which makes
+    the noise periodic with period / frequency along every axis; see tile()
+    to precompute one period.
+    """
+
+    def __init__(self, seed: int = 0, frequency: float = 1.0, period: int = LATTICE_SIZE) -> None:
+        if not 0 < period <= LATTICE_SIZE:
+            raise ValueError("Noise period must be between 1 and %d." % LATTICE_SIZE)
+        self.seed = seed
+        self.frequency = frequency
+        self.period = period
+        rng = np.random.default_rng(seed)
+        angles = rng.uniform(0.0, 2 * np.pi, LATTICE_SIZE)
+        self.gradients = np.stack((np.cos(angles), np.sin(angles)), axis=1)
+        # doubled so that permutation[permutation[x] + y] never wraps
+        self.permutation = np.tile(rng.permutation(LATTICE_SIZE), 2)
+        gradients_3d = rng.normal(size=(LATTICE_SIZE, 3))
+        self.gradients_3d = gradients_3d / np.linalg.norm(gradients_3d, axis=1)[:, np.newaxis]
+
+    def __call__(self, x, y, z=None) -> np.ndarray:
+        """Noise at the broadcast coordinates, 3D when z is given."""
+        if z is None:
+            return self.noise_2d(x, y)
+        return self.noise_3d(x, y, z)
+
+    def lattice(self, coordinate):
+        """Fractional part and wrapped indices of both surrounding lattice points."""
+        coordinate = np.asarray(coordinate, dtype=float) * self.frequency
+        floor = np.floor(coordinate)
+        index = floor.astype(np.intp) % self.period
+        return coordinate - floor, index, (index + 1) % self.period
+
+    def noise_2d(self, x, y) -> np.ndarray:
+        fx, ix0, ix1 = self.lattice(x)
+        fy, iy0, iy1 = self.lattice(y)
+        permutation = self.permutation
+        row0, row1 = permutation[ix0], permutation[ix1]
+
+        def corner(row, iy, gx, gy):
+            gradient = self.gradients[permutation[row + iy]]
+            return gradient[..., 0] * gx + gradient[..., 1] * gy
+
+        u, v = fade(fx), fade(fy)
+        bottom = lerp(corner(row0, iy0, fx, fy), corner(row1, iy0, fx - 1, fy), u)
+        top = lerp(corner(row0, iy1, fx, fy - 1), corner(row1, iy1, fx - 1, fy - 1), u)
+        return lerp(bottom, top, v) * NOISE_SCALE_2D
+
+    def noise_3d(self, x, y, z) -> np.ndarray:
+        fx, ix0, ix1 = self.lattice(x)
+        fy, iy0, iy1 = self.lattice(y)
+        fz, iz0, iz1 = self.lattice(z)
+        permutation = self.permutation
+        row0, row1 = permutation[ix0], permutation[ix1]
+        rows = {(0, 0): permutation[row0 + iy0], (1, 0): permutation[row1 + iy0],
+                (0, 1): permutation[row0 + iy1], (1, 1): permutation[row1 + iy1]}
+
+        def corner(dx, dy, dz):
+            gradient = self.gradients_3d[permutation[rows[dx, dy] + (iz1 if dz else iz0)]]
+            return gradient[..., 0] * (fx - dx) + gradient[..., 1] * (fy - dy) + gradient[..., 2] * (fz - dz)
+
+        u, v, w = fade(fx), fade(fy), fade(fz)
+        near = lerp(lerp(corner(0, 0, 0), corner(1, 0, 0), u), lerp(corner(0, 1, 0), corner(1, 1, 0), u), v)
+        far = lerp(lerp(corner(0, 0, 1), corner(1, 0, 1), u), lerp(corner(0, 1, 1), corner(1, 1, 1), u), v)
+        return lerp(near, far, w) * NOISE_SCALE_3D
+
+    def tile(self, resolution: int = 16) -> "NoiseTile":
+        """
+        Precompute one period of the 2D noise, resolution samples per lattice
+        cell. The table holds (period * resolution)^2 doubles, so tile noise
+        with a small period.
+        """
+        return NoiseTile(self, resolution)
+
+
+class NoiseTile:
+    """
+    One period of a GradientNoise's 2D noise sampled on a regular grid. The
+    grid wraps around, so lookups anywhere in the plane are a bilinear
+    interpolation of four table entries, much cheaper than evaluating the
+    noise and within a few thousandths of it at the default resolution.
+    """
+
+    def __init__(self, noise: GradientNoise, resolution: int = 16) -> None:
+        self.frequency = noise.frequency
+        self.resolution = resolution
+        self.size = noise.period * resolution
+        grid = np.arange(self.size) / (resolution * noise.frequency)
+        values = noise.noise_2d(grid[np.newaxis, :], grid[:, np.newaxis])
+        # the first row and column repeated last, so that index + 1 never wraps
+        self.values = np.pad(values, ((0, 1), (0, 1)), mode="wrap")
+
+    def __call__(self, x, y) -> np.ndarray:
+        size = self.size
+        scale = self.frequency * self.resolution
+        x = np.asarray(x, dtype=float) * scale % size
+        y = np.asarray(y, dtype=float) * scale % size
+        # a tiny negative coordinate wraps to exactly size
+        ix = np.minimum(x.astype(np.intp), size - 1)
+        iy = np.minimum(y.astype(np.intp), size - 1)
+        fx, fy = x - ix, y - iy
+        values = self.values
+        bottom = lerp(values[iy, ix], values[iy, ix + 1], fx)
+        top = lerp(values[iy + 1, ix], values[iy + 1, ix + 1], fx)
+        return lerp(bottom, top, fy)
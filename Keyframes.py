@@ -0,0 +1,273 @@
+import functools
+import json
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+from PySide6.QtCore import QEasingCurve
+from PySide6.QtGui import QColor
+
+# Samples per easing curve lookup table
+EASING_SAMPLES = 1024
+
+# Tables with at most this many columns are evaluated on plain floats; below
+# that, NumPy's per-call overhead costs more than the loop it replaces
+SCALAR_COLUMNS = 16
+
+# Samples per segment of the packed colour tables of narrow tables, enough
+# for the steepest standard easing to stay within one 8-bit step
+COLOR_SAMPLES = 4096
+
+Value = Union[float, Tuple[float, ...], QColor]
+
+
+@functools.lru_cache(maxsize=None)
+def easing_table(easing: str) -> Tuple[float, ...]:
+    """EASING_SAMPLES + 1 evenly spaced samples of a QEasingCurve type."""
+    curve = QEasingCurve(getattr(QEasingCurve.Type, easing))
+    return tuple(curve.valueForProgress(index / EASING_SAMPLES) for index in range(EASING_SAMPLES + 1))
+
+
+def pack_colors(channels: np.ndarray) -> np.ndarray:
+    """QColor.rgba() of (..., 4) floating point RGBA channels, rounded and clamped to 8 bits."""
+    red, green, blue, alpha = np.moveaxis(np.clip(np.rint(channels * 255), 0, 255).astype(np.uintc), -1, 0)
+    return alpha << 24 | red << 16 | green << 8 | blue
+
+
+class KeyframeTable:
+    """
+    Keyframe animations compiled into contiguous NumPy tables, so that every
+    animated property of a widget is evaluated by one vectorized call per
+    frame (see evaluate). Descriptions are plain dicts (or JSON):
+
+        {
+            "duration": 800,
+            "easing": "InOutExpo",
+            "tracks": {
+                "width": [[0, 100], [800, 200]],
+                "color": [[0, "#ffffff"], [400, "#333333", "Linear"]]
+            }
+        }
+
+    Each key is [time, value] or [time, value, easing]. The easing, the name
+    of a QEasingCurve type, shapes the segment that ends at that key and
+    defaults to the description's "easing" (Linear if absent). Values are
+    numbers, lists of numbers or colour names; a property holds its first
+    value before its first key and its last value after its last key.
+    duration defaults to the last key time.
+
+    values_at deliberately does not use the vectorized call for tables of
+    SCALAR_COLUMNS columns or fewer, such as a button's handful of
+    properties: one NumPy evaluation costs more than interpolating them on
+    plain floats. Their colours are looked up in tables of packed 8-bit
+    colours per segment, and, like QVariantAnimation emits only changed
+    values, left out while their 8-bit value does not change.
+    """
+
+    def __init__(self, names: List[str], kinds: List[str], columns: List[slice], times: np.ndarray,
+                 values: np.ndarray, easings: np.ndarray, curves: np.ndarray, duration: float) -> None:
+        self.names = names
+        self.kinds = kinds
+        self.columns = columns
+        self.times = times
+        self.values = values
+        self.easings = easings
+        self.curves = curves
+        self.duration = duration
+        # per segment (key k to key k + 1) constants, flattened so that a
+        # frame only gathers from them
+        width = times.shape[1]
+        self.offsets = np.arange(len(times)) * width
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spans = 1.0 / (times[:, 1:] - times[:, :-1])
+        spans[~np.isfinite(spans)] = 0.0
+        self.flat_times = times.ravel()
+        self.flat_values = values.ravel()
+        self.flat_spans = np.pad(spans, ((0, 0), (0, 1))).ravel()
+        self.flat_deltas = np.pad(values[:, 1:] - values[:, :-1], ((0, 0), (0, 1))).ravel()
+        self.flat_curves = curves.ravel()
+        self.flat_curve_offsets = np.pad(easings[:, 1:] * (EASING_SAMPLES + 1), ((0, 0), (0, 1))).ravel()
+        # a track holds still before its first key and after its last one
+        self.key_ranges = [(times[column.start, 0].item(), times[column.start][np.isfinite(times[column.start])][-1].item())
+                           for column in columns]
+        # the columns of a track share its key times and easings, and so do
+        # tracks keyed together, so narrow tables are evaluated on plain
+        # floats once per timing: key times, spans and easing tables per
+        # timing; values and deltas per key of its number and vector tracks,
+        # held and per segment packed colours of its colour tracks
+        self.timings: Optional[List[Tuple[list, list, list, list, list, list]]] = None
+        # packed colours at evaluated_time, see values_at
+        self.evaluated_time: Optional[float] = None
+        self.packed_colors: Dict[str, int] = {}
+        if len(times) <= SCALAR_COLUMNS:
+            curve_tables = [tuple(curve) for curve in curves.tolist()]
+            timings: Dict[Tuple, List[int]] = {}
+            for track, column in enumerate(columns):
+                row = column.start
+                count = int(np.isfinite(times[row]).sum())
+                timing = (tuple(times[row, :count].tolist()), tuple(easings[row, 1:count].tolist()))
+                timings.setdefault(timing, []).append(track)
+            self.timings = []
+            for (key_times, key_easings), tracks in timings.items():
+                count = len(key_times)
+                # eased progress at COLOR_SAMPLES + 1 even steps of every segment
+                positions = np.linspace(0.0, EASING_SAMPLES, COLOR_SAMPLES + 1)
+                samples = np.arange(EASING_SAMPLES + 1)
+                eased = np.array([np.interp(positions, samples, curves[easing]) for easing in key_easings])
+                numbers, vectors, colors = [], [], []
+                for track in tracks:
+                    key_values = values[columns[track], :count].T
+                    deltas = key_values[1:] - key_values[:-1]
+                    if kinds[track] == "color":
+                        segments = pack_colors(key_values[:-1, np.newaxis] + deltas[:, np.newaxis] * eased[..., np.newaxis])
+                        colors.append((names[track], [array("I", segment.tobytes()) for segment in segments],
+                                       pack_colors(key_values).tolist()))
+                    elif kinds[track] == "number":
+                        numbers.append((names[track], key_values[:, 0].tolist(), deltas[:, 0].tolist()))
+                    else:
+                        vectors.append((names[track], key_values.tolist(), deltas.tolist()))
+                self.timings.append((list(key_times), spans[columns[tracks[0]].start, :count - 1].tolist(),
+                                     [curve_tables[easing] for easing in key_easings], numbers, vectors, colors))
+
+    @staticmethod
+    def from_json(text: str) -> "KeyframeTable":
+        return KeyframeTable.compile(json.loads(text))
+
+    @staticmethod
+    def compile(description: Mapping) -> "KeyframeTable":
+        default_easing = description.get("easing", "Linear")
+        easing_names: List[str] = []
+        names, kinds, columns = [], [], []
+        rows: List[Tuple[List[float], List[float], List[int]]] = []
+        for name, keys in description["tracks"].items():
+            if not keys:
+                raise ValueError("Track '%s' has no keys." % name)
+            key_times, key_values, key_easings = [], [], []
+            kind = None
+            for key in keys:
+                time, value = float(key[0]), key[1]
+                if key_times and time < key_times[-1]:
+                    raise ValueError("Keys of track '%s' are not sorted by time." % name)
+                if isinstance(value, (str, QColor)):
+                    color = QColor(value)
+                    if not color.isValid():
+                        raise ValueError("Invalid colour '%s' in track '%s'." % (value, name))
+                    value_kind, value = "color", color.getRgbF()
+                elif isinstance(value, (list, tuple)):
+                    value_kind, value = "vector", tuple(float(component) for component in value)
+                else:
+                    value_kind, value = "number", (float(value),)
+                if kind is not None and (value_kind != kind or len(value) != len(key_values[-1])):
+                    raise ValueError("Values of track '%s' do not have the same type." % name)
+                kind = value_kind
+                easing = key[2] if len(key) > 2 else default_easing
+                if easing not in easing_names:
+                    if not hasattr(QEasingCurve.Type, easing):
+                        raise ValueError("Unknown easing '%s' in track '%s'." % (easing, name))
+                    easing_names.append(easing)
+                key_times.append(time)
+                key_values.append(value)
+                key_easings.append(easing_names.index(easing))
+
+            names.append(name)
+            kinds.append(kind)
+            columns.append(slice(len(rows), len(rows) + len(key_values[0])))
+            for component in range(len(key_values[0])):
+                rows.append((key_times, [value[component] for value in key_values], key_easings))
+
+        # every row gets the same number of keys, padding holds the last value forever
+        width = max(len(key_times) for key_times, _, _ in rows) + 1
+        times = np.full((len(rows), width), np.inf)
+        values = np.empty((len(rows), width))
+        easings = np.zeros((len(rows), width), dtype=np.intp)
+        for row, (key_times, key_values, key_easings) in enumerate(rows):
+            count = len(key_times)
+            times[row, :count] = key_times
+            values[row, :count] = key_values
+            values[row, count:] = key_values[-1]
+            easings[row, :count] = key_easings
+
+        curves = np.array([easing_table(easing) for easing in easing_names])
+
+        last_time = max(max(key_times) for key_times, _, _ in rows)
+        return KeyframeTable(names, kinds, columns, times, values, easings, curves,
+                             float(description.get("duration", last_time)))
+
+    def evaluate(self, time: float) -> np.ndarray:
+        """Every column of every track at time, in one pass over the tables."""
+        keys = self.offsets + np.maximum((self.times <= time).sum(axis=1) - 1, 0)
+        progress = (time - self.flat_times.take(keys)) * self.flat_spans.take(keys)
+        progress = np.minimum(np.maximum(progress, 0.0), 1.0)
+        # linear interpolation in the easing curve's lookup table
+        position = progress * EASING_SAMPLES
+        sample = np.minimum(position.astype(np.intp), EASING_SAMPLES - 1)
+        fraction = position - sample
+        sample += self.flat_curve_offsets.take(keys)
+        curves = self.flat_curves
+        eased = curves.take(sample) * (1 - fraction) + curves.take(sample + 1) * fraction
+        return self.flat_values.take(keys) + self.flat_deltas.take(keys) * eased
+
+    def values_at(self, time: float, previous_time: Optional[float] = None) -> Dict[str, Value]:
+        """
+        Track values at time: floats, tuples for lists, QColors for colours.
+        With previous_time, tracks that held still since then (both times
+        before their first key or both after their last) are left out, and
+        so are colours of narrow tables whose 8-bit value did not change
+        since previous_time, when that was the time of the previous call.
+        """
+        if self.timings is None:
+            columns = self.evaluate(time).tolist()
+            return {name: self.make_value(kind, columns[column])
+                    for name, kind, column, (first, last) in zip(self.names, self.kinds, self.columns, self.key_ranges)
+                    if previous_time is None or not ((time <= first and previous_time <= first)
+                                                     or (time >= last and previous_time >= last))}
+
+        values = {}
+        if previous_time is None or previous_time != self.evaluated_time:
+            self.packed_colors = {}
+        packed_colors = self.packed_colors
+        for times, spans, curves, numbers, vectors, colors in self.timings:
+            if previous_time is not None and ((time <= times[0] and previous_time <= times[0])
+                                              or (time >= times[-1] and previous_time >= times[-1])):
+                continue
+            # progress is None while the timing holds its first or last key
+            if time <= times[0]:
+                key, progress = 0, None
+            elif time >= times[-1]:
+                key, progress = len(times) - 1, None
+            else:
+                key = bisect_right(times, time) - 1
+                progress = (time - times[key]) * spans[key]
+            if numbers or vectors:
+                eased = 0.0
+                if progress is not None:
+                    position = progress * EASING_SAMPLES
+                    sample = min(int(position), EASING_SAMPLES - 1)
+                    fraction = position - sample
+                    curve = curves[key]
+                    eased = curve[sample] * (1 - fraction) + curve[sample + 1] * fraction
+                for name, key_values, deltas in numbers:
+                    values[name] = key_values[key] + deltas[key] * eased if eased else key_values[key]
+                for name, key_values, deltas in vectors:
+                    if eased:
+                        values[name] = tuple(value + delta * eased for value, delta in zip(key_values[key], deltas[key]))
+                    else:
+                        values[name] = tuple(key_values[key])
+            if colors:
+                sample = None if progress is None else int(progress * COLOR_SAMPLES + .5)
+                for name, segments, held in colors:
+                    packed = held[key] if sample is None else segments[key][sample]
+                    if packed_colors.get(name) != packed:
+                        packed_colors[name] = packed
+                        values[name] = QColor.fromRgba(packed)
+        self.evaluated_time = time
+        return values
+
+    @staticmethod
+    def make_value(kind: str, columns: List[float]) -> Value:
+        if kind == "number":
+            return columns[0]
+        if kind == "color":
+            return QColor.fromRgba(int(pack_colors(np.array(columns))))
+        return tuple(columns)
@@ -5,99 +5,51 @@
 #
 # ///////////////////////////////////////////////////////////////
 
+import math
+
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 from PySide6.QtWidgets import *
 
-class Arc:
-    def __init__(
-            self,
-            parent,
-            spacer,
-            startAngle,
-            spanAngle,
-            direction,
-            duration
-            ):
-        self.parent = parent
-        self.spacer = spacer
-        self.startAngle = startAngle
-        self.fixedStartAngle = self.startAngle
-        self.spanAngle = spanAngle
-        self.direction = direction
-        self.duration = duration
+from AnimationClock import animation_clock
+from SpriteCache import source_hash, sprite_cache
+from VisibilityGuard import VisibilityGuard
 
-        self.clockWise = True
-        self.antiClockWise = False
-
-    def getRotationAnimation(self):
-        animation = QVariantAnimation(self.parent)
-        animation.setStartValue(self.spacer)
-        animation.setEndValue(self.spacer+360*2)
-        animation.setDuration(self.duration)
-        animation.setEasingCurve(QEasingCurve.InOutSine)
-        animation.valueChanged.connect(self.updateSpacer)
-        return animation
-
-    def getSpanAngleAnimation(self):
-        animation = QVariantAnimation(self.parent)
-        animation.setStartValue(1/16)
-        animation.setEndValue(1/16+360)
-        animation.setDuration(self.duration*.5)
-        animation.finished.connect(self.animationFinished)
-        animation.valueChanged.connect(self.updateSpanAngle)
-        return animation
-    
-    def getStartAngleAnimation(self):
-        animation = QVariantAnimation(self.parent)
-        animation.setStartValue(270)
-        animation.setEndValue(270+360)
-        animation.setDuration(self.duration*.5)
-        animation.finished.connect(self.startAnimationFinished)
-        animation.valueChanged.connect(self.updateStartAngle)
-        return animation
-    
-    def startAnimationFinished(self):
-        self.startAngle = 270
-        self.fixedStartAngle = self.startAngle
-        self.spanAngle = 1/16
-        self.direction = not self.direction
-
-    def startAnimations(self):
-        seqGroup = QSequentialAnimationGroup(self.parent)
-        if self.direction:
-            seqGroup.addAnimation(self.getSpanAngleAnimation())
-            seqGroup.addAnimation(self.getStartAngleAnimation())
-        else:
-            seqGroup.addAnimation(self.getStartAngleAnimation())
-            seqGroup.addAnimation(self.getSpanAngleAnimation())
-        parGroup = QParallelAnimationGroup(self.parent)
-        parGroup.addAnimation(self.getRotationAnimation())
-        parGroup.addAnimation(seqGroup)
-        parGroup.setLoopCount(10)
-        parGroup.start()
-
-    def animationFinished(self):
-        self.direction = not self.direction
-
-    def updateStartAngle(self, newValue):
-        self.startAngle = newValue
-        self.parent.update()
-
-    def updateSpacer(self, newValue):
-        self.spacer = newValue
-        self.parent.update()
-    
-    def updateSpanAngle(self, newValue):
-        self.spanAngle = newValue
-        self.parent.update()
+# saved sprite atlases are only reused while this file is unchanged
+SOURCE_HASH = source_hash(__file__)
+
+def state_at(time, duration=4*1000):
+    """
+    Both arcs of the loader time milliseconds after it started, as
+    (startAngle, spanAngle) pairs in 1/16th of a degree for drawArc.
+
+    One loop lasts duration: the whole figure turns twice (InOutSine) while
+    the outer arc first grows from 270 degrees for half a loop, then its
+    start catches up with its end for the other half. The inner arc covers
+    the rest of the circle.
+    """
+    progress = time % duration / duration
+    spacer = 360*2*-(math.cos(math.pi*progress)-1)/2
+    if progress < .5:
+        startAngle = 270
+        spanAngle = 1/16+360*progress*2
+    else:
+        startAngle = 270+360*(progress-.5)*2
+        spanAngle = 360-(startAngle-270)
+    spanAngle = max(spanAngle, 1/16)
+    angle = -(spacer+startAngle)*16
+    return (angle, -spanAngle*16), (angle, (360-spanAngle)*16)
 
 class Loader(QFrame):
     def __init__(
             self, 
             parent=None,
             color=QColor("#ffffff"),
-            penWidth=20
+            penWidth=20,
+            sprite=False,
+            spriteFrameRate=60,
+            duration=4*1000,
+            loopCount=-1
             ):
         QFrame.__init__(self, parent=parent)
 
@@ -106,26 +58,33 @@ class Loader(QFrame):
         self.color = color
         self.initPen(penWidth)
 
-        self.arc1 = Arc(self, 0, 270, 1/16, True, 4*1000)
-        self.arc1.startAnimations()
+        # PAUSE THE ANIMATION WHILE THE LOADER CANNOT BE SEEN
+        self.visibilityGuard = VisibilityGuard(self)
+
+        # BLIT PRE-RENDERED FRAMES OF ONE LOOP INSTEAD OF STROKING EVERY FRAME
+        self.sprite = sprite
+        self.spriteFrameRate = spriteFrameRate
+
+        # THE ARCS ARE A FUNCTION OF THE TIME, A SINGLE TIMELINE ADVANCES IT
+        self.duration = duration
+        self.time = 0
+        self.timeline = animation_clock.start(self, self.duration, self.setTime,
+                                              end_value=self.duration, loop_count=loopCount)
+
+    def setTime(self, newValue):
+        self.time = newValue
 
     def calculateXR(self, level):
         x = self.pen.width()*level/2
         r = self.width()-self.pen.width()*level
         return x, r
     
-    def draw(self):
+    def draw(self, arcs):
+        outerArc, innerArc = arcs
         x, r = self.calculateXR(1)
-        arc = self.arc1
-        if arc.direction:
-            spanAngle = arc.startAngle-arc.fixedStartAngle+arc.spanAngle
-        else: 
-            spanAngle = 360-(arc.startAngle-arc.fixedStartAngle)
-        if spanAngle < 1/16:
-            spanAngle = 1/16
-        self.painter.drawArc(x, x, r, r, -(arc.spacer+arc.startAngle)*16, -spanAngle*16) 
+        self.painter.drawArc(x, x, r, r, *outerArc) 
         x, r = self.calculateXR(5)
-        self.painter.drawArc(x, x, r, r, -(arc.spacer+arc.startAngle)*16, (360-spanAngle)*16) 
+        self.painter.drawArc(x, x, r, r, *innerArc) 
 
     def initPen(self, penWidth):
         self.pen = QPen()
@@ -133,9 +92,21 @@ class Loader(QFrame):
         self.pen.setWidth(penWidth)
         self.pen.setCapStyle(Qt.RoundCap)
 
-    def paintEvent(self, e):
-        self.painter = QPainter(self)
-        self.painter.setRenderHint(QPainter.Antialiasing)
+    def paintFrame(self, painter, time):
+        self.painter = painter
         self.painter.setPen(self.pen)
-        self.draw()
-        self.painter.end()
\ No newline at end of file
+        self.draw(state_at(time, self.duration))
+
+    def paintEvent(self, e):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        atlas = None
+        if self.sprite:
+            key = ("LoadingIndicator-01", SOURCE_HASH, self.color.rgba(), self.pen.width())
+            atlas = sprite_cache.atlas(key, QRectF(self.rect()), self.devicePixelRatioF(),
+                                       self.duration, self.spriteFrameRate)
+        if atlas is not None:
+            atlas.draw(painter, self.time, self.paintFrame)
+        else:
+            self.paintFrame(painter, self.time)
+        painter.end()
\ No newline at end of file
@@ -9,6 +9,14 @@ from PySide6.QtCore import *
 from PySide6.QtGui import *
 from PySide6.QtWidgets import *
 
+from AnimationClock import animation_clock
+from Keyframes import KeyframeTable
+from SpriteCache import source_hash, sprite_cache
+from VisibilityGuard import VisibilityGuard
+
+# saved sprite atlases are only reused while this file is unchanged
+SOURCE_HASH = source_hash(__file__)
+
 class RoundedRect:
     def __init__(self, x=0, y=0, w=0, h=0):
         self.x = x
@@ -16,13 +24,37 @@ class RoundedRect:
         self.w = w
         self.h = h
 
+# ONE LOOP, TIMES IN STEPS OF animationDuration. TRACKS ARE "<RECT INDEX>.<ATTRIBUTE>",
+# MOVING x OR y ALSO RESIZES THE RECT SO ITS FAR EDGE STAYS AT 130
+LOADER_KEYFRAMES = {
+    "easing": "InOutSine",
+    "duration": 8,
+    "tracks": {
+        # MOVE DOWN
+        "1.h": [[0, 40], [1, 120], [2, 40]],
+        "1.y": [[1, 10], [2, 90]],
+        # MOVE RIGHT
+        "0.w": [[2, 40], [3, 120], [4, 40]],
+        "0.x": [[3, 10], [4, 90]],
+        # MOVE UP
+        "2.y": [[4, 90], [5, 10, "Linear"]],
+        "2.h": [[4, 40], [5, 120, "Linear"], [6, 40]],
+        # MOVE LEFT
+        "1.x": [[6, 90], [7, 10]],
+        "1.w": [[6, 40], [7, 120], [8, 40]]
+    }
+}
+
 class Loader(QFrame):
     def __init__(
             self, 
             parent=None,
             color=QColor("#333333"),
             penWidth=20,
-            animationDuration=400
+            animationDuration=400,
+            sprite=False,
+            spriteFrameRate=60,
+            loopCount=10
             ):
         QFrame.__init__(self, parent=parent)
         
@@ -34,8 +66,16 @@ class Loader(QFrame):
         self.animationDuration = animationDuration
 
         self.initRects()
-        
-        self.startAnimations()
+        self.initKeyframes()
+
+        # PAUSE THE ANIMATIONS WHILE THE LOADER CANNOT BE SEEN
+        self.visibilityGuard = VisibilityGuard(self)
+
+        # BLIT PRE-RENDERED FRAMES OF ONE LOOP INSTEAD OF STROKING EVERY FRAME
+        self.sprite = sprite
+        self.spriteFrameRate = spriteFrameRate
+        self.time = 0
+        self.startAnimations(loopCount)
     
     def initRects(self):
         x = self.penWidth/2
@@ -44,143 +84,59 @@ class Loader(QFrame):
             RoundedRect(x+80, x, 40, 40),
             RoundedRect(x, x+80, 40, 40)
         ]
-    
-    def getVariantAnimation(self):
-        animation = QVariantAnimation(self)
-        animation.setDuration(self.animationDuration)
-        animation.setEasingCurve(QEasingCurve.InOutSine)
-        return animation
-
-    # ANIMATION INITALIZER METHODS ==============================================================
-    
-    def initMoveDownAnimation(self):
-        self.moveDownGP = QSequentialAnimationGroup(self)
-
-        animation = self.getVariantAnimation()
-        animation.setStartValue(40)
-        animation.setEndValue(120)
-        animation.valueChanged.connect(self.moveDownUpdateH)
-        self.moveDownGP.addAnimation(animation)
-
-        animation = self.getVariantAnimation()
-        animation.setStartValue(10)
-        animation.setEndValue(90)
-        animation.valueChanged.connect(self.moveDownUpdateY)
-        self.moveDownGP.addAnimation(animation)
-    
-    def initMoveRightAnimation(self):
-        self.moveRightGP = QSequentialAnimationGroup(self)
-
-        animation = self.getVariantAnimation()
-        animation.setStartValue(40)
-        animation.setEndValue(120)
-        animation.valueChanged.connect(self.moveRightUpdateW)
-        self.moveRightGP.addAnimation(animation)
-
-        animation = self.getVariantAnimation()
-        animation.setStartValue(10)
-        animation.setEndValue(90)
-        animation.valueChanged.connect(self.moveRightUpdateX)
-        self.moveRightGP.addAnimation(animation)
-
-    def initMoveUpAnimation(self):
-        self.moveUpGP = QSequentialAnimationGroup(self)
-
-        animation = QVariantAnimation(self)
-        animation.setDuration(self.animationDuration)
-        animation.setStartValue(90)
-        animation.setEndValue(10)
-        animation.valueChanged.connect(self.moveUpUpdateY)
-        self.moveUpGP.addAnimation(animation)
-
-        animation = self.getVariantAnimation()
-        animation.setStartValue(120)
-        animation.setEndValue(40)
-        animation.valueChanged.connect(self.moveUpUpdateH)
-        self.moveUpGP.addAnimation(animation)
-
-    def initMoveLeftAnimation(self):
-        self.moveLeftGP = QSequentialAnimationGroup(self)
-
-        animation = self.getVariantAnimation()
-        animation.setStartValue(90)
-        animation.setEndValue(10)
-        animation.valueChanged.connect(self.moveLeftUpdateX)
-        self.moveLeftGP.addAnimation(animation)
-
-        animation = self.getVariantAnimation()
-        animation.setStartValue(120)
-        animation.setEndValue(40)
-        animation.valueChanged.connect(self.moveLeftUpdateH)
-        self.moveLeftGP.addAnimation(animation)
-
-    # UPDATE METHODS ==============================================================
-
-    def moveDownUpdateH(self, newValue):
-        self.rectsList[1].h = newValue
-        self.update()
-    
-    def moveDownUpdateY(self, newValue):
-        self.rectsList[1].y = newValue
-        self.rectsList[1].h = 130-newValue
-        self.update()
-    
-    def moveRightUpdateW(self, newValue):
-        self.rectsList[0].w = newValue
-        self.update()
-
-    def moveRightUpdateX(self, newValue):
-        self.rectsList[0].x = newValue
-        self.rectsList[0].w = 130-newValue
-        self.update()
-
-    def moveUpUpdateY(self, newValue):
-        self.rectsList[2].y = newValue
-        self.rectsList[2].h = 130-newValue
-        self.update()
 
-    def moveUpUpdateH(self, newValue):
-        self.rectsList[2].h = newValue
-        self.update()
-
-    def moveLeftUpdateX(self, newValue):
-        self.rectsList[1].x = newValue
-        self.rectsList[1].w = 130-newValue
-        self.update()
-
-    def moveLeftUpdateH(self, newValue):
-        self.rectsList[1].w = newValue
-        self.update()
+    def initKeyframes(self):
+        description = dict(LOADER_KEYFRAMES)
+        description["duration"] = LOADER_KEYFRAMES["duration"]*self.animationDuration
+        description["tracks"] = {
+            name: [[key[0]*self.animationDuration, *key[1:]] for key in keys]
+            for name, keys in LOADER_KEYFRAMES["tracks"].items()
+        }
+        self.keyframes = KeyframeTable.compile(description)
+        self.period = self.keyframes.duration
+        # (RECT INDEX, ATTRIBUTE) OF EVERY TRACK, IN TABLE ORDER
+        self.targets = [(int(name.split(".")[0]), name.split(".")[1]) for name in self.keyframes.names]
+
+    def rectsAt(self, time):
+        x = self.penWidth/2
+        rects = [RoundedRect(x, x, 40, 40), RoundedRect(x+80, x, 40, 40), RoundedRect(x, x+80, 40, 40)]
+        # ALL TRACKS IN ONE VECTORIZED CALL
+        for (index, attribute), value in zip(self.targets, self.keyframes.evaluate(time % self.period).tolist()):
+            setattr(rects[index], attribute, value)
+        return rects
 
     # START ANIMATIONS METHOD ===========================================================
 
-    def startAnimations(self):
-        self.initMoveDownAnimation()
-        self.initMoveRightAnimation()
-        self.initMoveUpAnimation()
-        self.initMoveLeftAnimation()
-        gp = QSequentialAnimationGroup(self)
-        gp.addAnimation(self.moveDownGP)
-        gp.addAnimation(self.moveRightGP)
-        gp.addAnimation(self.moveUpGP)
-        gp.addAnimation(self.moveLeftGP)
-        self.moveLeftGP.finished.connect(self.finished)
-        gp.setLoopCount(10)
-        gp.start()
-    
-    def finished(self):
-        self.rectsList = [self.rectsList[2], self.rectsList[0], self.rectsList[1]]
+    def startAnimations(self, loopCount):
+        # ADVANCED BY THE SHARED CLOCK, WHICH REPAINTS ONCE PER FRAME
+        animation_clock.start(self, self.period, self.setTime, end_value=self.period, loop_count=loopCount)
+
+    def setTime(self, newValue):
+        self.time = newValue
+        if not self.sprite:
+            self.rectsList = self.rectsAt(newValue)
 
     # OVERRIDE PAINT EVENT ==============================================================
 
-    def paintEvent(self, e):
-        painter = QPainter(self)
+    def paintFrame(self, painter, time):
+        # WITHOUT A TIME, DRAW THE CURRENT RECTS
         pen = QPen()
         pen.setColor(self.color)
         pen.setWidth(self.penWidth)
         painter.setPen(pen)
-        painter.setRenderHint(QPainter.Antialiasing)
-        x = self.penWidth/2
-        for rect in self.rectsList:
+        for rect in (self.rectsList if time is None else self.rectsAt(time)):
             painter.drawRoundedRect(rect.x, rect.y, rect.w, rect.h, 20, 20)
-        painter.end()
\ No newline at end of file
+
+    def paintEvent(self, e):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        atlas = None
+        if self.sprite:
+            key = ("LoadingIndicator-02", SOURCE_HASH, self.color.rgba(), self.penWidth)
+            atlas = sprite_cache.atlas(key, QRectF(self.rect()), self.devicePixelRatioF(),
+                                       self.period, self.spriteFrameRate)
+        if atlas is not None:
+            atlas.draw(painter, self.time, self.paintFrame)
+        else:
+            self.paintFrame(painter, self.time if self.sprite else None)
+        painter.end()
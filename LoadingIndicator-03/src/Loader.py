@@ -5,34 +5,84 @@
 #
 # ///////////////////////////////////////////////////////////////
 
-import math
-import time
-
-from perlin_noise import PerlinNoise as Noise
 from typing import Optional
 
-from PySide6.QtCore import QVariantAnimation, QPointF, QRect
+import math
+import random
+
+import numpy as np
+from PySide6.QtCore import QVariantAnimation, QPointF, QRect, QRectF
 from PySide6.QtGui import (QPainter, Qt, QPaintEvent, QColor, QBrush,
-                           QPainterPath, QFont)
+                           QPainterPath, QPolygonF, QFont, QImage, QResizeEvent)
 from PySide6.QtWidgets import QFrame, QWidget
 
+from GradientNoise import GradientNoise
+from Polylines import polygon_from_array, simplify_polyline
+from VisibilityGuard import VisibilityGuard
+
+
+# Ways of drawing the overlap of the two blobs, see Loader.draw_intersection
+INTERSECTION_PATH = "path"
+INTERSECTION_CLIP = "clip"
+INTERSECTION_COMPOSITE = "composite"
+INTERSECTION_RADIAL = "radial"
+INTERSECTION_MODES = (INTERSECTION_PATH, INTERSECTION_CLIP, INTERSECTION_COMPOSITE, INTERSECTION_RADIAL)
+
+# Level of detail: outlines stay within this many device pixels of the blob
+MAX_PIXEL_ERROR = 0.25
+MIN_VERTICES = 16
+MAX_VERTICES = 360
+# the noise pushes a vertex out by at most 1 + 0.5 / 2.5 times the radius
+MAX_DEFORMATION = 1.2
+# chords stray from the blobs up to 2.2 times as far as from a circle of
+# their largest radius (measured over seeds and times), with some margin
+BLOB_BENDING = 2.5
+# below this radius in device pixels, outlines also go through simplify_polyline
+SIMPLIFY_RADIUS = 16
+
 
 class Loader(QFrame):
-    def __init__(self, parent: Optional[QWidget] = None) -> None:
+    def __init__(self, parent: Optional[QWidget] = None, seed: Optional[int] = None,
+                 intersection_mode: str = INTERSECTION_RADIAL) -> None:
         QFrame.__init__(self, parent)
 
         self.setFrameShape(QFrame.NoFrame)
         self.setFixedSize(600, 600)
 
         self.start = 0
-        self.step = 1
-        self.rayon = 200
+        # degrees between outline vertices, None picks them from the on-screen size
+        self.step: Optional[float] = None
+        self.max_error = MAX_PIXEL_ERROR
+        self.vertex_count = 0
+        # a third of the size, 200 at the default 600 x 600, see resizeEvent
+        self.rayon = self.get_rayon()
         self.message = "LOADING..."
         self.animation: Optional[QVariantAnimation] = None
-        self.noise_generator1 = Noise(octaves=.8, seed=int(time.time()))
-        self.noise_generator2 = Noise(octaves=.8, seed=int(time.time() + 1))
+        # new blobs on every run, unless a seed is given: the same seed always gives the same blobs
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.noise_generator1 = GradientNoise(seed=seed, frequency=.8)
+        self.noise_generator2 = GradientNoise(seed=seed + 1, frequency=.8)
+        # unit circle directions of the outline vertices, for the current step
+        self.directions: Optional[np.ndarray] = None
+        self.directions_step: Optional[float] = None
+        if intersection_mode not in INTERSECTION_MODES:
+            raise ValueError("Unknown intersection mode '%s'." % intersection_mode)
+        self.intersection_mode = intersection_mode
+        # reused by the composite mode, reallocated when the size or DPR change
+        self.intersection_buffer: Optional[QImage] = None
+        # pause the animation while the loader cannot be seen
+        self.visibility_guard = VisibilityGuard(self)
         # self.start_animation()
 
+    def get_rayon(self) -> float:
+        return min(self.width(), self.height()) / 3
+
+    def resizeEvent(self, e: QResizeEvent) -> None:
+        # the blobs follow the widget size, and their level of detail with them
+        self.rayon = self.get_rayon()
+        QFrame.resizeEvent(self, e)
+
     def start_animation(self) -> None:
         self.animation = QVariantAnimation(self)
         self.animation.setDuration(60 * 1000)
@@ -45,40 +95,146 @@ class Loader(QFrame):
         self.start = new_value
         self.update()
 
-    def get_deformed_point(self, angle: float, noise_generator: Noise) -> QPointF:
-        radian_angle = math.radians(angle)
-        _x = math.cos(radian_angle)
-        _y = math.sin(radian_angle)
+    def get_step(self, radius: float) -> float:
+        """
+        Degrees between vertices for a blob of radius device pixels: the
+        largest step whose chords stay within max_error of the blob, between
+        MIN_VERTICES and MAX_VERTICES.
+        """
+        if self.step is not None:
+            return self.step
+        radius *= MAX_DEFORMATION * BLOB_BENDING
+        if radius <= self.max_error:
+            count = MIN_VERTICES
+        else:
+            count = math.ceil(math.pi / math.acos(1 - self.max_error / radius))
+        return 360 / min(max(count, MIN_VERTICES), MAX_VERTICES)
+
+    def get_directions(self, step: float) -> np.ndarray:
+        if self.directions_step != step:
+            # the outline starts at 1 degree, as it always has
+            radian_angles = np.radians(np.arange(1, 360, step))
+            self.directions = np.stack((np.cos(radian_angles), np.sin(radian_angles)), axis=1)
+            self.directions_step = step
+        return self.directions
+
+    def get_deformed_points(self, noise_generator: GradientNoise, step: float = 1) -> np.ndarray:
+        """The outline as an (N, 2) array, every vertex pushed along its direction by the noise."""
+        directions = self.get_directions(step)
         offset = self.start / 100
-        noise = noise_generator([_x + offset, _y + offset])
-        c = self.rayon * (1 + noise/2.5)
-        point = QPointF(_x * c, _y * c)
-        return point
+        noise = noise_generator(directions[:, 0] + offset, directions[:, 1] + offset)
+        return directions * (self.rayon * (1 + noise / 2.5))[:, np.newaxis]
 
     def draw_deformed_circles(self, painter: QPainter) -> None:
         painter.save()
 
         painter.translate(self.rect().center())
 
-        path1 = QPainterPath()
-        path2 = QPainterPath()
+        # device pixels per logical pixel, DPR included
+        scale = math.sqrt(abs(painter.deviceTransform().determinant()))
+        radius = self.rayon * scale
+        step = self.get_step(radius)
+        # tiny blobs are also simplified, within the same error
+        tolerance = self.max_error / scale if radius < SIMPLIFY_RADIUS else None
 
-        angle = 1
-        path1.moveTo(self.get_deformed_point(angle, self.noise_generator1))
-        path2.moveTo(self.get_deformed_point(angle, self.noise_generator2))
-        while angle < 360:
-            path1.lineTo(self.get_deformed_point(angle, self.noise_generator1))
-            path2.lineTo(self.get_deformed_point(angle, self.noise_generator2))
-            angle += self.step
+        points1 = self.get_deformed_points(self.noise_generator1, step)
+        points2 = self.get_deformed_points(self.noise_generator2, step)
+        self.vertex_count = len(points1)
 
-        painter.drawPath(path1)
+        painter.drawPolygon(self.get_outline(points1, tolerance))
         painter.setBrush(QBrush(QColor("#ff2e63")))
-        painter.drawPath(path2)
+        painter.drawPolygon(self.get_outline(points2, tolerance))
         painter.setBrush(QBrush(QColor("#082e63")))
-        painter.drawPath(path2.intersected(path1))
+        self.draw_intersection(painter, points1, points2, tolerance)
 
         painter.restore()
 
+    def get_outline(self, points: np.ndarray, tolerance: Optional[float] = None) -> QPolygonF:
+        if tolerance is not None:
+            points = simplify_polyline(points, tolerance)
+        return polygon_from_array(points)
+
+    def draw_intersection(self, painter: QPainter, points1: np.ndarray, points2: np.ndarray,
+                          tolerance: Optional[float] = None) -> None:
+        """
+        Fill the overlap of both blobs with the painter's brush.
+
+        radial: both outlines have a vertex on every direction, so the
+        overlap is the outline through the vertex nearer to the center on
+        each of them. One polygon fill, within a fraction of a pixel of the
+        exact overlap where the outlines cross between two directions.
+        path: QPainterPath.intersected, exact but a costly boolean operation.
+        clip: polygon2 filled through a clip of polygon1, whose edge is not
+        antialiased.
+        composite: polygon1 drawn into an offscreen buffer, then erased
+        outside polygon2 (DestinationOut with the complement of polygon2,
+        made by the odd-even fill rule rather than a boolean operation) and
+        blitted, antialiased like the path mode.
+        """
+        if self.intersection_mode == INTERSECTION_RADIAL:
+            nearer = (points1 ** 2).sum(axis=1) < (points2 ** 2).sum(axis=1)
+            painter.drawPolygon(self.get_outline(np.where(nearer[:, np.newaxis], points1, points2), tolerance))
+            return
+        polygon1, polygon2 = self.get_outline(points1, tolerance), self.get_outline(points2, tolerance)
+        if self.intersection_mode == INTERSECTION_PATH:
+            path1 = QPainterPath()
+            path1.addPolygon(polygon1)
+            path2 = QPainterPath()
+            path2.addPolygon(polygon2)
+            painter.drawPath(path2.intersected(path1))
+        elif self.intersection_mode == INTERSECTION_CLIP:
+            painter.save()
+            path1 = QPainterPath()
+            path1.addPolygon(polygon1)
+            painter.setClipPath(path1, Qt.IntersectClip)
+            painter.drawPolygon(polygon2)
+            painter.restore()
+        else:
+            self.draw_composited_intersection(painter, polygon1, polygon2)
+
+    def get_intersection_buffer(self) -> QImage:
+        dpr = self.devicePixelRatioF()
+        size = self.size() * dpr
+        buffer = self.intersection_buffer
+        if buffer is None or buffer.size() != size or buffer.devicePixelRatio() != dpr:
+            buffer = QImage(size, QImage.Format_ARGB32_Premultiplied)
+            buffer.setDevicePixelRatio(dpr)
+            self.intersection_buffer = buffer
+        return buffer
+
+    def draw_composited_intersection(self, painter: QPainter, polygon1: QPolygonF, polygon2: QPolygonF) -> None:
+        # only the pixels both blobs may cover are cleared, drawn and blitted
+        center = QPointF(self.rect().center())
+        bounds = polygon1.boundingRect().intersected(polygon2.boundingRect())
+        if bounds.isEmpty():
+            return
+        bounds = bounds.translated(center).toAlignedRect().adjusted(-1, -1, 1, 1)
+        bounds = bounds.intersected(self.rect())
+        buffer = self.get_intersection_buffer()
+
+        buffer_painter = QPainter(buffer)
+        buffer_painter.setCompositionMode(QPainter.CompositionMode_Source)
+        buffer_painter.fillRect(bounds, Qt.transparent)
+        buffer_painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        buffer_painter.setRenderHints(painter.renderHints())
+        buffer_painter.setPen(Qt.NoPen)
+        buffer_painter.setBrush(painter.brush())
+        buffer_painter.translate(center)
+        buffer_painter.drawPolygon(polygon1)
+        # composition only touches the pixels a shape covers, so erase the
+        # outside of polygon2 rather than keep its inside
+        outside = QPainterPath()
+        outside.addRect(QRectF(bounds).translated(-center))
+        outside.addPolygon(polygon2)
+        buffer_painter.setCompositionMode(QPainter.CompositionMode_DestinationOut)
+        buffer_painter.setBrush(Qt.black)
+        buffer_painter.drawPath(outside)
+        buffer_painter.end()
+
+        dpr = buffer.devicePixelRatio()
+        source = QRectF(bounds.x() * dpr, bounds.y() * dpr, bounds.width() * dpr, bounds.height() * dpr)
+        painter.drawImage(QRectF(bounds).translated(-center), buffer, source)
+
     def draw_message(self, painter: QPainter) -> None:
         font = QFont("Ebrima", 30)
         font.setLetterSpacing(QFont.SpacingType.AbsoluteSpacing, 10)
@@ -95,9 +251,9 @@ class Loader(QFrame):
         painter.setPen(Qt.NoPen)
 
         painter.setBrush(QBrush(QColor("#66FF66")))
-        _rect = QRect(0, 0, 400, 400)
+        _rect = QRect(0, 0, round(2 * self.rayon), round(2 * self.rayon))
         _rect.moveCenter(self.rect().center())
-        painter.drawRoundedRect(_rect, 100, 100)
+        painter.drawRoundedRect(_rect, self.rayon / 2, self.rayon / 2)
         # self.draw_deformed_circles(painter)
         # self.draw_message(painter)
 
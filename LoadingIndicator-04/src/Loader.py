@@ -7,14 +7,25 @@
 
 from typing import Optional
 
-from PySide6.QtCore import QVariantAnimation, QPointF
+import numpy as np
+from PySide6.QtCore import QPointF, QRectF
 from PySide6.QtGui import (QPainter, Qt, QPaintEvent, QColor, QBrush,
                            QPainterPath, QFont)
 from PySide6.QtWidgets import QFrame, QWidget
 
+from AnimationClock import Timeline, animation_clock
+from SpriteCache import source_hash, sprite_cache
+from VisibilityGuard import VisibilityGuard
+
+# saved sprite atlases are only reused while this file is unchanged
+SOURCE_HASH = source_hash(__file__)
+
+SQUARE_COUNT = 12
+OFFSET_DURATION = 2 * 1000
+
 
 class Loader(QFrame):
-    def __init__(self, parent: Optional[QWidget] = None) -> None:
+    def __init__(self, parent: Optional[QWidget] = None, sprite: bool = False) -> None:
         QFrame.__init__(self, parent)
 
         self.setFrameShape(QFrame.NoFrame)
@@ -26,39 +37,60 @@ class Loader(QFrame):
         self.start_angle = 0
         self.index = -1
 
-        self.offsets = [0 for _ in range(12)]
+        # one linear track per square: its offset moves from offset_starts to
+        # offset_ends over OFFSET_DURATION from offset_times (elapsed time of
+        # the rotation), NaN once it has arrived
+        self.offsets = np.zeros(SQUARE_COUNT)
+        self.offset_starts = np.zeros(SQUARE_COUNT)
+        self.offset_ends = np.zeros(SQUARE_COUNT)
+        self.offset_times = np.full(SQUARE_COUNT, np.nan)
+
+        # blit a pre-rendered bar instead of painting it: every frame of the
+        # turn is the same bar rotated about the center, so a single tile
+        # drawn through a rotated painter stands for all of them
+        self.sprite = sprite
+        self.period = 30 * 1000
 
-        self.animation: Optional[QVariantAnimation] = None
+        self.timeline: Optional[Timeline] = None
+        # pause the animations while the loader cannot be seen
+        self.visibility_guard = VisibilityGuard(self)
 
         self.start_animation()
 
     def start_animation(self) -> None:
-        self.animation = QVariantAnimation(self)
-        self.animation.setDuration(30 * 1000)
-        self.animation.setStartValue(self.start_angle)
-        self.animation.setEndValue(self.start_angle + 360)
-        self.animation.valueChanged.connect(self.update_angle)
-        self.animation.setLoopCount(-1)
-        self.animation.start()
-
-    def update_angle(self, new_value: float) -> None:
-        self.start_angle = new_value
-        if self.start_angle % 30 == 0:
-            self.index = int(self.start_angle // 30) - 1
-            self.start_offset_animation()
-        self.update()
-
-    def start_offset_animation(self):
-        self.animation = QVariantAnimation(self)
-        self.animation.setDuration(2 * 1000)
-        self.animation.setStartValue(self.offsets[self.index])
-        self.animation.setEndValue(self.rayon - 20*(self.index+1))
-        self.animation.valueChanged.connect(self.update_offset)
-        self.animation.start()
-
-    def update_offset(self, new_value):
-        self.offsets[self.index] = new_value
-        self.update()
+        # every 30 degrees of the turn starts the offset track of one square,
+        # fired by the clock even when a slow frame skips past the angle
+        events = [self.period * square / SQUARE_COUNT for square in range(SQUARE_COUNT)]
+        self.timeline = animation_clock.start(self, self.period, self.update_time, end_value=self.period,
+                                              loop_count=-1, events=events, on_event=self.start_offset_track)
+
+    def update_time(self, time: float) -> None:
+        self.start_angle = time * 360 / self.period
+        self.update_offsets(self.timeline.last_elapsed)
+
+    def start_offset_track(self, square: int, elapsed: float) -> None:
+        # as before, the event at 30 * square degrees moves square - 1 towards
+        # rayon - 20 * square. The event at 0 is the start of the animation
+        # (index -1, towards rayon) once, then the end of every turn, 360
+        # degrees (index 11, towards rayon - 240)
+        if square == 0 and elapsed > 0:
+            square = SQUARE_COUNT
+        self.index = square - 1
+        self.offset_starts[self.index] = self.offsets_at(elapsed)[self.index]
+        self.offset_ends[self.index] = self.rayon - 20 * square
+        self.offset_times[self.index] = elapsed
+
+    def offsets_at(self, elapsed: float) -> np.ndarray:
+        active = ~np.isnan(self.offset_times)
+        progress = np.clip((elapsed - self.offset_times[active]) / OFFSET_DURATION, 0, 1)
+        offsets = self.offsets.copy()
+        offsets[active] = self.offset_starts[active] + (self.offset_ends[active] - self.offset_starts[active]) * progress
+        return offsets
+
+    def update_offsets(self, elapsed: float) -> None:
+        self.offsets = self.offsets_at(elapsed)
+        # arrived tracks stop being evaluated
+        self.offset_times[elapsed - self.offset_times >= OFFSET_DURATION] = np.nan
 
     def draw_rectangles(self, painter: QPainter):
         painter.save()
@@ -92,9 +124,15 @@ class Loader(QFrame):
         painter.drawRect(_x, _y, self.side, self.side)
         painter.restore()
 
-    def paintEvent(self, e: QPaintEvent) -> None:
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+    def get_sprite_bounds(self) -> QRectF:
+        # the bar at 0 degrees points up from the center, plus a pixel for antialiasing
+        center = QPointF(self.rect().center())
+        return QRectF(center.x() - self.side / 2 - 1, center.y() - self.rayon - 1, self.side + 2, self.rayon + 2)
+
+    def paint_frame(self, painter: QPainter, time: float) -> None:
+        self.draw(painter, time * 360 / self.period)
+
+    def draw(self, painter: QPainter, start_angle: float) -> None:
         painter.setBrush(QBrush(QColor("#fefefe")))
         painter.setPen(Qt.NoPen)
 
@@ -105,11 +143,31 @@ class Loader(QFrame):
         painter.translate(self.rect().center())
 
         painter.rotate(270)
-        painter.rotate(self.start_angle)
+        painter.rotate(start_angle)
         painter.setOpacity(.3)
         painter.drawRect(0, -self.side // 2, self.rayon, self.side)
         painter.setOpacity(1)
 
         painter.restore()
 
+    def paintEvent(self, e: QPaintEvent) -> None:
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        atlas = None
+        if self.sprite:
+            # one frame per turn: the bar at 0 degrees
+            atlas = sprite_cache.atlas(("LoadingIndicator-04", SOURCE_HASH, self.rayon, self.side),
+                                       self.get_sprite_bounds(), self.devicePixelRatioF(), self.period,
+                                       1000 / self.period)
+        if atlas is not None:
+            center = QPointF(self.rect().center())
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.translate(center)
+            painter.rotate(self.start_angle)
+            painter.translate(-center)
+            atlas.draw(painter, 0, self.paint_frame)
+        else:
+            self.draw(painter, self.start_angle)
+
         painter.end()
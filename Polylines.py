@@ -0,0 +1,56 @@
+import math
+import struct
+
+import numpy as np
+from PySide6.QtCore import QByteArray, QDataStream, QIODevice
+from PySide6.QtGui import QPolygonF
+
+
+def polygon_from_array(points: np.ndarray) -> QPolygonF:
+    """
+    Build a QPolygonF from an (N, 2) array in one copy. The buffer is handed
+    to Qt in QDataStream's QPolygonF layout (point count followed by x, y
+    doubles), so no QPointF is created on the Python side.
+    """
+    points = np.ascontiguousarray(points, dtype="<f8")
+    data = QByteArray(struct.pack("<I", len(points)) + points.tobytes())
+    stream = QDataStream(data, QIODevice.ReadOnly)
+    stream.setByteOrder(QDataStream.LittleEndian)
+    polygon = QPolygonF()
+    stream >> polygon
+    return polygon
+
+
+def simplify_polyline(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Ramer-Douglas-Peucker simplification of an (N, 2) polyline: the vertices
+    kept are a subset of points, including both ends, and every dropped
+    vertex lies within tolerance of the simplified polyline. Meant for the
+    short polylines of small shapes, so spans are processed from an explicit
+    stack with plain floats rather than one NumPy call per span.
+    """
+    count = len(points)
+    if count < 3:
+        return points
+    xs, ys = points[:, 0].tolist(), points[:, 1].tolist()
+    keep = [0, count - 1]
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        x0, y0 = xs[first], ys[first]
+        dx, dy = xs[last] - x0, ys[last] - y0
+        chord_length = math.hypot(dx, dy)
+        farthest, farthest_distance = -1, tolerance
+        for index in range(first + 1, last):
+            if chord_length > 0:
+                distance = abs((xs[index] - x0) * dy - (ys[index] - y0) * dx) / chord_length
+            else:
+                distance = math.hypot(xs[index] - x0, ys[index] - y0)
+            if distance > farthest_distance:
+                farthest, farthest_distance = index, distance
+        if farthest >= 0:
+            keep.append(farthest)
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    keep.sort()
+    return points[keep]
@@ -0,0 +1,76 @@
+from typing import Callable, Dict, Mapping, Optional
+
+from PySide6.QtCore import QRect
+from PySide6.QtWidgets import QWidget
+
+from AnimationClock import AnimationClock, Timeline, animation_clock
+from Keyframes import KeyframeTable, Value
+
+
+class PropertyAnimator:
+    """
+    Animates a whole record of a widget's properties, numbers and QColors
+    alike, on the shared AnimationClock. Every frame interpolates all of
+    them in one KeyframeTable evaluation and delivers them in a single
+    callback, which by default sets them as attributes of the widget; the
+    clock then repaints the widget once. Properties holding still between
+    two frames are not delivered again, and a frame where all of them do
+    is not repainted. Starting a new animation replaces the running one,
+    continuing from whatever values were reached.
+    """
+
+    def __init__(self, widget: QWidget, callback: Optional[Callable[[Dict[str, Value]], None]] = None,
+                 clock: AnimationClock = animation_clock) -> None:
+        self.widget = widget
+        self.callback = callback
+        self.clock = clock
+        self.keyframes: Optional[KeyframeTable] = None
+        # time of the previous frame of the running animation
+        self.time: Optional[float] = None
+        self.timeline: Optional[Timeline] = None
+        self.finished: Optional[Callable[[], None]] = None
+        self.frames = 0
+
+    def animate(self, description: Mapping, finished: Optional[Callable[[], None]] = None) -> None:
+        """Run a keyframe description (see KeyframeTable) once."""
+        self.stop()
+        self.keyframes = KeyframeTable.compile(description)
+        self.time = None
+        self.finished = finished
+        self.timeline = self.clock.start(self.widget, self.keyframes.duration, self.apply,
+                                         end_value=self.keyframes.duration, finished=self.animation_finished)
+
+    def animate_to(self, targets: Mapping[str, Value], duration: float, easing: str = "Linear",
+                   finished: Optional[Callable[[], None]] = None) -> None:
+        """Animate the widget's attributes from their current values to targets."""
+        self.animate({
+            "easing": easing,
+            "tracks": {name: [[0, getattr(self.widget, name)], [duration, target]]
+                       for name, target in targets.items()},
+        }, finished)
+
+    def apply(self, time: float) -> Optional[QRect]:
+        values = self.keyframes.values_at(time, self.time)
+        self.time = time
+        if not values:
+            return QRect()
+        self.frames += 1
+        if self.callback is not None:
+            self.callback(values)
+        else:
+            for name, value in values.items():
+                setattr(self.widget, name, value)
+        return None
+
+    def animation_finished(self) -> None:
+        self.timeline = None
+        if self.finished is not None:
+            self.finished()
+
+    def is_running(self) -> bool:
+        return self.timeline is not None
+
+    def stop(self) -> None:
+        if self.timeline is not None:
+            self.clock.remove(self.timeline)
+            self.timeline = None
@@ -12,6 +12,8 @@ from PySide6.QtGui import (QColor, Qt, QPainterPath, QPainter,
                            QBrush, QPen, QFont, QPaintEvent)
 from PySide6.QtWidgets import QPushButton, QWidget
 
+from VisibilityGuard import VisibilityGuard
+
 
 class ReloadButton(QPushButton):
     def __init__(self, parent: Optional[QWidget] = None) -> None:
@@ -26,6 +28,8 @@ class ReloadButton(QPushButton):
         self.currentPercentage = .8
         self.animationDuration = 1000
         self.animationEasingCurve = QEasingCurve.InOutSine
+        # PAUSE THE ANIMATIONS WHILE THE BUTTON CANNOT BE SEEN
+        self.visibilityGuard = VisibilityGuard(self)
 
         self.clicked.connect(self.startAnimations)
 
@@ -0,0 +1,302 @@
+import hashlib
+import json
+import math
+import os
+import struct
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from PySide6.QtCore import QRectF, QStandardPaths, Qt, QTimer
+from PySide6.QtGui import QImage, QPainter
+
+# paint_frame(painter, time) draws the widget as it looks time milliseconds into its period
+PaintFrame = Callable[[QPainter, float], None]
+
+# Binary format of saved atlases, see SpriteDiskCache.save
+SPRITE_ATLAS_MAGIC = b"SPRATLS\0"
+SPRITE_ATLAS_VERSION = 1
+SPRITE_ATLAS_HEADER = struct.Struct("<8sII")
+
+
+def source_hash(*filenames: str) -> str:
+    """Hash of the files drawing a widget, so saved atlases go stale when its code changes."""
+    digest = hashlib.blake2b(digest_size=16)
+    for filename in filenames:
+        with open(filename, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class SpriteAtlas:
+    """
+    One period of a looping animation pre-rendered at a fixed frame rate and
+    packed into a single QImage. Tiles cover bounds (in widget coordinates)
+    at the device pixel ratio and are rendered lazily, the first time their
+    frame is drawn, so creating an atlas costs nothing up front.
+    """
+
+    def __init__(self, bounds: QRectF, device_pixel_ratio: float, period: float, frame_count: int) -> None:
+        self.bounds = QRectF(bounds)
+        self.device_pixel_ratio = device_pixel_ratio
+        self.period = period
+        self.frame_count = frame_count
+        self.tile_width = math.ceil(bounds.width() * device_pixel_ratio)
+        self.tile_height = math.ceil(bounds.height() * device_pixel_ratio)
+        self.columns = math.ceil(math.sqrt(frame_count))
+        rows = math.ceil(frame_count / self.columns)
+        self.image = QImage(self.tile_width * self.columns, self.tile_height * rows,
+                            QImage.Format_ARGB32_Premultiplied)
+        self.image.fill(Qt.transparent)
+        self.rendered: List[bool] = [False] * frame_count
+        # called once every tile has been rendered
+        self.on_complete: Optional[Callable[["SpriteAtlas"], None]] = None
+        # memory backing an image that does not own its pixels
+        self.buffer: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_image(cls, image: QImage, bounds: QRectF, device_pixel_ratio: float,
+                   period: float, frame_count: int) -> "SpriteAtlas":
+        """Wrap a fully rendered atlas image, e.g. one loaded from disk."""
+        atlas = cls.__new__(cls)
+        atlas.bounds = QRectF(bounds)
+        atlas.device_pixel_ratio = device_pixel_ratio
+        atlas.period = period
+        atlas.frame_count = frame_count
+        atlas.tile_width = math.ceil(bounds.width() * device_pixel_ratio)
+        atlas.tile_height = math.ceil(bounds.height() * device_pixel_ratio)
+        atlas.columns = math.ceil(math.sqrt(frame_count))
+        atlas.image = image
+        atlas.rendered = [True] * frame_count
+        atlas.on_complete = None
+        atlas.buffer = None
+        return atlas
+
+    @staticmethod
+    def byte_count(bounds: QRectF, device_pixel_ratio: float, frame_count: int) -> int:
+        return math.ceil(bounds.width() * device_pixel_ratio) * math.ceil(bounds.height() * device_pixel_ratio) \
+            * 4 * frame_count
+
+    def frame_index(self, time: float) -> int:
+        return int(time % self.period * self.frame_count / self.period) % self.frame_count
+
+    def frame_time(self, index: int) -> float:
+        return index * self.period / self.frame_count
+
+    def tile_rect(self, index: int) -> QRectF:
+        row, column = divmod(index, self.columns)
+        return QRectF(column * self.tile_width, row * self.tile_height, self.tile_width, self.tile_height)
+
+    def render(self, index: int, paint_frame: PaintFrame) -> None:
+        tile = self.tile_rect(index)
+        painter = QPainter(self.image)
+        painter.setClipRect(tile)
+        painter.translate(tile.topLeft())
+        painter.scale(self.device_pixel_ratio, self.device_pixel_ratio)
+        painter.translate(-self.bounds.topLeft())
+        painter.setRenderHint(QPainter.Antialiasing)
+        paint_frame(painter, self.frame_time(index))
+        painter.end()
+        self.rendered[index] = True
+        if self.on_complete is not None and all(self.rendered):
+            self.on_complete(self)
+
+    def render_all(self, paint_frame: PaintFrame) -> None:
+        """Render every missing tile, e.g. before saving the atlas."""
+        for index in range(self.frame_count):
+            if not self.rendered[index]:
+                self.render(index, paint_frame)
+
+    def draw(self, painter: QPainter, time: float, paint_frame: PaintFrame) -> None:
+        index = self.frame_index(time)
+        if not self.rendered[index]:
+            self.render(index, paint_frame)
+        painter.drawImage(self.bounds, self.image, self.tile_rect(index))
+
+
+class SpriteDiskCache:
+    """
+    Completed atlases saved under a versioned directory so the next launch
+    memory-maps them instead of rendering. Each file is a header, a JSON
+    description and the raw premultiplied ARGB32 pixels, 16-byte aligned.
+    Files are named after a hash of the full atlas key; the least recently
+    used ones are deleted when the directory grows past max_bytes, except
+    those still mapped by a loaded atlas.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024) -> None:
+        if directory is None:
+            directory = os.path.join(QStandardPaths.writableLocation(QStandardPaths.CacheLocation), "sprite-atlases")
+        self.directory = os.path.join(directory, "v%d" % SPRITE_ATLAS_VERSION)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        # atlases whose image still maps their file, by filename
+        self.loaded: "weakref.WeakValueDictionary[str, SpriteAtlas]" = weakref.WeakValueDictionary()
+
+    def filename(self, key: Hashable) -> str:
+        name = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name + ".atlas")
+
+    def save(self, key: Hashable, atlas: SpriteAtlas) -> None:
+        image = atlas.image
+        description = json.dumps({
+            "key": repr(key), "width": image.width(), "height": image.height(),
+            "bytes_per_line": image.bytesPerLine(), "bounds": atlas.bounds.getRect(),
+            "device_pixel_ratio": atlas.device_pixel_ratio, "period": atlas.period,
+            "frame_count": atlas.frame_count,
+        }).encode("utf-8")
+        description += b" " * (-(SPRITE_ATLAS_HEADER.size + len(description)) % 16)
+        filename = self.filename(key)
+        # written next to the final name and renamed, so a crash never leaves half a file
+        with open(filename + ".tmp", "wb") as file:
+            file.write(SPRITE_ATLAS_HEADER.pack(SPRITE_ATLAS_MAGIC, SPRITE_ATLAS_VERSION, len(description)))
+            file.write(description)
+            file.write(bytes(image.constBits()))
+        os.replace(filename + ".tmp", filename)
+        self.evict()
+
+    def load(self, key: Hashable) -> Optional[SpriteAtlas]:
+        """The saved atlas for key, or None. Files that cannot be read are deleted, like a miss."""
+        filename = self.filename(key)
+        if not os.path.exists(filename):
+            return None
+        try:
+            atlas = self.read(filename, key)
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            # empty, truncated or garbage files, e.g. left by a disk running full
+            atlas = None
+        if atlas is None:
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            return None
+        os.utime(filename)
+        self.loaded[filename] = atlas
+        return atlas
+
+    @staticmethod
+    def read(filename: str, key: Hashable) -> Optional[SpriteAtlas]:
+        with open(filename, "rb") as file:
+            header = file.read(SPRITE_ATLAS_HEADER.size)
+        magic, version, description_size = SPRITE_ATLAS_HEADER.unpack(header)
+        if magic != SPRITE_ATLAS_MAGIC or version != SPRITE_ATLAS_VERSION:
+            return None
+        data = np.memmap(filename, dtype=np.uint8, mode="r")
+        start = SPRITE_ATLAS_HEADER.size + description_size
+        description = json.loads(data[SPRITE_ATLAS_HEADER.size:start].tobytes().decode("utf-8"))
+        if description["key"] != repr(key):
+            return None
+        width, height, bytes_per_line = description["width"], description["height"], description["bytes_per_line"]
+        pixels = data[start:start + bytes_per_line * height]
+        if width <= 0 or bytes_per_line < width * 4 or len(pixels) != bytes_per_line * height:
+            return None
+        bounds = QRectF(*description["bounds"])
+        atlas = SpriteAtlas.from_image(QImage(), bounds, description["device_pixel_ratio"],
+                                       description["period"], description["frame_count"])
+        # every tile has to lie inside the image
+        if atlas.frame_count <= 0 or not QRectF(0, 0, width, height).contains(atlas.tile_rect(atlas.frame_count - 1)) \
+                or atlas.columns * atlas.tile_width > width:
+            return None
+        # pixels are paged in on first draw
+        atlas.image = QImage(pixels, width, height, bytes_per_line, QImage.Format_ARGB32_Premultiplied)
+        # the QImage does not own its buffer, the mapping has to live as long as the atlas
+        atlas.buffer = pixels
+        return atlas
+
+    def evict(self) -> None:
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".atlas")]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(filename) for filename in files)
+        for filename in files:
+            if total <= self.max_bytes:
+                break
+            if filename in self.loaded:
+                continue
+            size = os.path.getsize(filename)
+            try:
+                os.remove(filename)
+            except OSError:
+                # e.g. mapped by another process on Windows, the next save tries again
+                continue
+            total -= size
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.endswith(".atlas"):
+                os.remove(os.path.join(self.directory, name))
+
+
+class SpriteCache:
+    """
+    Process-wide store of sprite atlases under a memory budget. Keys combine
+    the caller's key (widget class and drawing parameters) with the bounds,
+    device pixel ratio, period and frame count, so a widget moved to a
+    screen with another DPR gets its own atlas. Least recently drawn atlases
+    are evicted first; an atlas larger than the whole budget is refused and
+    the widget should paint directly instead. With a disk cache enabled,
+    atlases are loaded from disk on a miss and saved once fully rendered.
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.disk: Optional[SpriteDiskCache] = None
+        self.entries: "OrderedDict[Tuple, SpriteAtlas]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refusals = 0
+        self.disk_hits = 0
+
+    def enable_disk_cache(self, directory: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.disk = SpriteDiskCache(directory, max_bytes)
+
+    def atlas(self, key: Hashable, bounds: QRectF, device_pixel_ratio: float,
+              period: float, frame_rate: float) -> Optional[SpriteAtlas]:
+        # whole pixels, so blitted tiles line up with what direct painting would give
+        bounds = QRectF(bounds.toAlignedRect())
+        frame_count = max(1, round(period * frame_rate / 1000))
+        full_key = (key, bounds.getRect(), device_pixel_ratio, period, frame_count)
+        atlas = self.entries.get(full_key)
+        if atlas is not None:
+            self.hits += 1
+            self.entries.move_to_end(full_key)
+            return atlas
+
+        size = SpriteAtlas.byte_count(bounds, device_pixel_ratio, frame_count)
+        if size > self.max_bytes:
+            self.refusals += 1
+            return None
+        self.misses += 1
+        while self.entries and self.bytes + size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.image.sizeInBytes()
+            self.evictions += 1
+        atlas = self.disk.load(full_key) if self.disk is not None else None
+        if atlas is not None:
+            self.disk_hits += 1
+        else:
+            atlas = SpriteAtlas(bounds, device_pixel_ratio, period, frame_count)
+            if self.disk is not None:
+                disk = self.disk
+                # the last tile is rendered inside a paintEvent, write the file after it
+                atlas.on_complete = lambda completed: QTimer.singleShot(0, lambda: disk.save(full_key, completed))
+        self.entries[full_key] = atlas
+        self.bytes += atlas.image.sizeInBytes()
+        return atlas
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "refusals": self.refusals, "disk_hits": self.disk_hits, "size": len(self.entries),
+                "bytes": self.bytes}
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.refusals = self.disk_hits = 0
+
+
+# Shared by widgets so identical loaders draw from the same atlas
+sprite_cache = SpriteCache()
@@ -0,0 +1,137 @@
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Mapping, Union
+
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QPainterPath
+
+from TrimmablePainterPath import PreparedPainterPath
+
+SVG_PATH_TOKEN = re.compile(r"[MmLlHhVvCcSsQqTtZzAa]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+# Number of coordinates taken by each command
+SVG_PATH_ARGUMENTS = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6, "S": 4, "Q": 4, "T": 2, "Z": 0}
+
+
+class SvgPathImporter:
+    """
+    Turns SVG path data (the d attribute) into prepared, length-indexed
+    paths. Supports M, L, H, V, C, S, Q, T and Z in absolute and relative
+    form. Prepared paths are memoized in a bounded LRU keyed on a hash of the
+    data's tokens, so building the same widget again does not parse or
+    measure anything.
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        if max_size < 1:
+            raise ValueError("Cache size must be at least 1.")
+        self.max_size = max_size
+        self.entries: "OrderedDict[bytes, PreparedPainterPath]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_hash(data: str) -> bytes:
+        # Hashing the tokens makes spacing and comma differences irrelevant
+        return hashlib.blake2b(" ".join(SVG_PATH_TOKEN.findall(data)).encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def parse(data: str) -> QPainterPath:
+        path = QPainterPath()
+        tokens = SVG_PATH_TOKEN.findall(data)
+        x = y = start_x = start_y = 0.0
+        # Last control point of the previous C/S or Q/T, for the reflected shorthands
+        cubic_control = quad_control = None
+        command = None
+        i = 0
+        while i < len(tokens):
+            explicit = tokens[i].isalpha()
+            if explicit:
+                command = tokens[i]
+                i += 1
+            elif command is None:
+                raise ValueError("SVG path data must start with a command.")
+            upper = command.upper()
+            if upper not in SVG_PATH_ARGUMENTS:
+                raise ValueError("Unsupported SVG path command '%s'." % command)
+            if upper == "Z" and not explicit:
+                raise ValueError("Unexpected number after SVG path command '%s'." % command)
+            count = SVG_PATH_ARGUMENTS[upper]
+            arguments = tokens[i:i + count]
+            if len(arguments) != count or any(token.isalpha() for token in arguments):
+                raise ValueError("Missing arguments for SVG path command '%s'." % command)
+            values = [float(token) for token in arguments]
+            i += count
+
+            relative = command.islower()
+            if upper == "H":
+                values = [values[0] + (x if relative else 0.0), y]
+                upper, relative = "L", False
+            elif upper == "V":
+                values = [x, values[0] + (y if relative else 0.0)]
+                upper, relative = "L", False
+            if relative:
+                values = [value + (y if k % 2 else x) for k, value in enumerate(values)]
+
+            next_cubic_control = next_quad_control = None
+            if upper == "M":
+                x, y = start_x, start_y = values
+                path.moveTo(x, y)
+                # Further coordinate pairs after a moveto are implicit linetos
+                command = "l" if relative else "L"
+            elif upper == "L":
+                x, y = values
+                path.lineTo(x, y)
+            elif upper in ("C", "S"):
+                if upper == "S":
+                    c1 = (2 * x - cubic_control[0], 2 * y - cubic_control[1]) if cubic_control else (x, y)
+                    values = [*c1, *values]
+                path.cubicTo(*values)
+                next_cubic_control = values[2:4]
+                x, y = values[4:6]
+            elif upper in ("Q", "T"):
+                if upper == "T":
+                    control = (2 * x - quad_control[0], 2 * y - quad_control[1]) if quad_control else (x, y)
+                    values = [*control, *values]
+                path.quadTo(QPointF(*values[:2]), QPointF(*values[2:]))
+                next_quad_control = values[:2]
+                x, y = values[2:4]
+            else:
+                path.closeSubpath()
+                x, y = start_x, start_y
+            cubic_control, quad_control = next_cubic_control, next_quad_control
+        return path
+
+    def prepare(self, data: str) -> PreparedPainterPath:
+        key = self.content_hash(data)
+        prepared_path = self.entries.get(key)
+        if prepared_path is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return prepared_path
+
+        self.misses += 1
+        prepared_path = PreparedPainterPath(self.parse(data))
+        self.entries[key] = prepared_path
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return prepared_path
+
+    def prepare_many(self, icons: Union[Mapping[str, str], Iterable[str]]
+                     ) -> Union[Dict[str, PreparedPainterPath], List[PreparedPainterPath]]:
+        """Prepare a whole icon set, given as a name -> path data mapping or a list."""
+        if isinstance(icons, Mapping):
+            return {name: self.prepare(data) for name, data in icons.items()}
+        return [self.prepare(data) for data in icons]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+
+# Shared by widgets so identical path data is only parsed once per process
+svg_path_importer = SvgPathImporter()
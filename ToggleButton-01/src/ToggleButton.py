@@ -4,66 +4,98 @@
 # All rights reserved.
 #
 # ///////////////////////////////////////////////////////////////
-from dataclasses import dataclass
 from typing import Optional
 
-from PySide6.QtCore import QPointF, QLineF
 from PySide6.QtCore import Qt, QPoint, QEasingCurve, QParallelAnimationGroup, \
     QVariantAnimation
 from PySide6.QtGui import QColor, QPainterPath, QPen, QPainter
 from PySide6.QtWidgets import QCheckBox, QWidget
-from TrimmablePainterPath import TrimmablePainterPath
+from TrimmablePainterPath import CUBIC_LENGTH_ERROR, PreparedPainterPath, TrimCache, TrimmablePainterPath, \
+    cubic_length, split_cubic
+from VisibilityGuard import VisibilityGuard
 
 
-@dataclass
-class Element:
-    x: float
-    y: float
+class QBezier:
+    __slots__ = ("x1", "y1", "x2", "y2", "x3", "y3", "x4", "y4")
 
+    # SCRATCH STACK OF CURVES (8 FLOATS EACH) SHARED BY ALL SUBDIVISIONS
+    MAX_DEPTH = 32
+    stack = [0.0] * 8 * (MAX_DEPTH + 1)
 
-class QBezier:
     def __init__(self, p0, p1, p2, p3):
         self.x1, self.y1 = p0.x, p0.y
         self.x2, self.y2 = p1.x, p1.y
         self.x3, self.y3 = p2.x, p2.y
         self.x4, self.y4 = p3.x, p3.y
 
-    def length(self, error=0.01):
-        length_list = [0.0]  # Initialize the list with the starting length value
-        self.add_if_close(length_list, error)
-        length = length_list[0]  # Retrieve the modified length value
+    @classmethod
+    def fromPoints(cls, points):
+        # BUILDS A CURVE FROM (x1, y1, ..., x4, y4) WITHOUT POINT OBJECTS
+        bezier = cls.__new__(cls)
+        (bezier.x1, bezier.y1, bezier.x2, bezier.y2,
+         bezier.x3, bezier.y3, bezier.x4, bezier.y4) = points
+        return bezier
+
+    def points(self):
+        return (self.x1, self.y1, self.x2, self.y2,
+                self.x3, self.y3, self.x4, self.y4)
+
+    def length(self, error=CUBIC_LENGTH_ERROR):
+        return cubic_length(self.points(), error)
+
+    def subdivisionLength(self, error=CUBIC_LENGTH_ERROR):
+        # SUBDIVIDE UNTIL THE CONTROL POLYGON IS WITHIN ERROR OF THE CHORD,
+        # DEPTH-FIRST ON THE SCRATCH STACK INSTEAD OF RECURSING
+        stack = QBezier.stack
+        stack[0], stack[1], stack[2], stack[3] = self.x1, self.y1, self.x2, self.y2
+        stack[4], stack[5], stack[6], stack[7] = self.x3, self.y3, self.x4, self.y4
+        top = 1
+        length = 0.0
+        while top:
+            top -= 1
+            base = top * 8
+            x1, y1, x2, y2 = stack[base], stack[base + 1], stack[base + 2], stack[base + 3]
+            x3, y3, x4, y4 = stack[base + 4], stack[base + 5], stack[base + 6], stack[base + 7]
+
+            lenArc = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** .5 \
+                + ((x3 - x2) ** 2 + (y3 - y2) ** 2) ** .5 \
+                + ((x4 - x3) ** 2 + (y4 - y3) ** 2) ** .5
+            chord = ((x4 - x1) ** 2 + (y4 - y1) ** 2) ** .5
+            if lenArc - chord <= error or top + 2 > QBezier.MAX_DEPTH + 1:
+                length += lenArc
+                continue
+
+            # SECOND HALF GOES BELOW THE FIRST ONE SO THE FIRST IS POPPED NEXT
+            mx1, my1 = (x1 + x2) / 2, (y1 + y2) / 2
+            mx2, my2 = (x2 + x3) / 2, (y2 + y3) / 2
+            mx3, my3 = (x3 + x4) / 2, (y3 + y4) / 2
+            mx4, my4 = (mx1 + mx2) / 2, (my1 + my2) / 2
+            mx5, my5 = (mx2 + mx3) / 2, (my2 + my3) / 2
+            mx, my = (mx4 + mx5) / 2, (my4 + my5) / 2
+            stack[base], stack[base + 1], stack[base + 2], stack[base + 3] = mx, my, mx5, my5
+            stack[base + 4], stack[base + 5], stack[base + 6], stack[base + 7] = mx3, my3, x4, y4
+            base += 8
+            stack[base], stack[base + 1], stack[base + 2], stack[base + 3] = x1, y1, mx1, my1
+            stack[base + 4], stack[base + 5], stack[base + 6], stack[base + 7] = mx4, my4, mx, my
+            top += 2
         return length
 
     def add_if_close(self, length_list, error):
-        len_arc = 0
-        len_arc += QLineF(QPointF(self.x1, self.y1), QPointF(self.x2, self.y2)).length()
-        len_arc += QLineF(QPointF(self.x2, self.y2), QPointF(self.x3, self.y3)).length()
-        len_arc += QLineF(QPointF(self.x3, self.y3), QPointF(self.x4, self.y4)).length()
-        chord = QLineF(QPointF(self.x1, self.y1), QPointF(self.x4, self.y4)).length()
-
-        if (len_arc - chord) > error:
-            halves = self.split()
-            halves[0].add_if_close(length_list, error)
-            halves[1].add_if_close(length_list, error)
-            return
-
-        length_list[0] += len_arc
+        length_list[0] += self.subdivisionLength(error)
 
     def split(self):
-        mid1 = Element((self.x1 + self.x2) / 2, (self.y1 + self.y2) / 2)
-        mid2 = Element((self.x2 + self.x3) / 2, (self.y2 + self.y3) / 2)
-        mid3 = Element((self.x3 + self.x4) / 2, (self.y3 + self.y4) / 2)
-        mid4 = Element((mid1.x + mid2.x) / 2, (mid1.y + mid2.y) / 2)
-        mid5 = Element((mid2.x + mid3.x) / 2, (mid2.y + mid3.y) / 2)
-        midpoint = Element((mid4.x + mid5.x) / 2, (mid4.y + mid5.y) / 2)
+        first, second = self.splitPoints()
+        return QBezier.fromPoints(first), QBezier.fromPoints(second)
 
-        first_half = QBezier(Element(self.x1, self.y1), mid1, mid4, midpoint)
-        second_half = QBezier(midpoint, mid5, mid3, Element(self.x4, self.y4))
-
-        return first_half, second_half
+    def splitPoints(self):
+        # RETURNS THE TWO HALVES AS (x1, y1, ..., x4, y4) TUPLES
+        return split_cubic(self.points(), .5)
 
 
 class ToggleButton(QCheckBox):
+    # SHARED BY ALL TOGGLES, ENTRIES ARE KEYED ON THE PATH GEOMETRY
+    trimCache = TrimCache(max_size=2048, resolution=1 / 2048)
+
     def __init__(self, parent: Optional[QWidget] = None) -> None:
         QCheckBox.__init__(self, parent)
         self.setFixedSize(200, 120)
@@ -74,6 +106,9 @@ class ToggleButton(QCheckBox):
         self.backgroundColor = QColor("#414141")
         self.indicatorColor = QColor("#ffffff")
         self.borderWidth = 24
+        self.preparedBackgroundPath = None
+        # PAUSE THE ANIMATIONS WHILE THE BUTTON CANNOT BE SEEN
+        self.visibilityGuard = VisibilityGuard(self)
         # CONNECT SIGNAL
         self.stateChanged.connect(self.startAnimation)
 
@@ -120,14 +155,23 @@ class ToggleButton(QCheckBox):
         parGroup.addAnimation(self.getIndicatorColorAnimation())
         parGroup.start()
 
+    def getPreparedBackgroundPath(self,
+                                  backgroundPath: QPainterPath) -> PreparedPainterPath:
+        # THE BACKGROUND PATH ONLY CHANGES WITH THE WIDGET SIZE
+        if self.preparedBackgroundPath is None or \
+                self.preparedBackgroundPath.path != backgroundPath:
+            self.preparedBackgroundPath = TrimmablePainterPath.prepare(backgroundPath)
+        return self.preparedBackgroundPath
+
     def drawAnimatedPath(self, painter: QPainter,
                          backgroundPath: QPainterPath) -> None:
-        if self.percentage + 0.5 > 1:
-            path1 = TrimmablePainterPath.trim(backgroundPath, self.percentage, 1)
-            path2 = TrimmablePainterPath.trim(backgroundPath, 0, self.percentage + 0.5 - 1)
-            animatedPath = path1 + path2
-        else:
-            animatedPath = TrimmablePainterPath.trim(backgroundPath, self.percentage, self.percentage + 0.5)
+        preparedPath = self.getPreparedBackgroundPath(backgroundPath)
+        endPercentage = self.percentage + 0.5
+        # THE BACKGROUND PATH IS CLOSED, SO THE WINDOW CAN WRAP AROUND 1
+        if endPercentage > 1:
+            endPercentage -= 1
+        animatedPath = TrimmablePainterPath.trim(preparedPath, self.percentage,
+                                                 endPercentage, self.trimCache)
 
         painter.drawPath(animatedPath)
 
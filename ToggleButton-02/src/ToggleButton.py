@@ -10,6 +10,10 @@ from PySide6.QtCore import *
 from PySide6.QtGui import *
 from PySide6.QtWidgets import *
 
+from AnimationClock import Timeline, animation_clock
+from Keyframes import KeyframeTable
+from VisibilityGuard import VisibilityGuard
+
 
 class ToggleButton(QCheckBox):
     def __init__(self, parent: Optional[QWidget] = None) -> None:
@@ -23,92 +27,47 @@ class ToggleButton(QCheckBox):
         self.leftIconColor = QColor("#ffffff")
         self.rightIconColor = QColor("#333333")
         self.animationDuration = 800
-
-    def newQVariantAnimation(self) -> QVariantAnimation:
-        animation = QVariantAnimation(self)
-        animation.setDuration(self.animationDuration)
-        animation.setEasingCurve(QEasingCurve.InOutExpo)
-        return animation
-
-    def getBlackRectWidthAnimation(self) -> QVariantAnimation:
-        blackRectWidthAnimation = self.newQVariantAnimation()
-        blackRectWidthAnimation.setStartValue(self.blackRectWidth)
-        blackRectWidthAnimation.setEndValue(
-            [self.width(), self.height()][not self.isChecked()])
-        blackRectWidthAnimation.valueChanged.connect(
-            self.updateBlackRectWidth)
-        return blackRectWidthAnimation
-
-    def getBlackRectXPosAnimation(self) -> QVariantAnimation:
-        blackRectXPosAnimation = self.newQVariantAnimation()
-        blackRectXPosAnimation.setStartValue(self.blackRectXPos)
-        blackRectXPosAnimation.setEndValue(
-            [self.width() // 2, 0][not self.isChecked()])
-        blackRectXPosAnimation.setDuration(self.animationDuration)
-        blackRectXPosAnimation.valueChanged.connect(
-            self.updateBlackRectXPos)
-        return blackRectXPosAnimation
-
-    def getLeftIconColorAnimation(self) -> QVariantAnimation:
-        leftIconColorAnimation = QVariantAnimation(self)
-        leftIconColorAnimation.setStartValue(self.leftIconColor)
-        leftIconColorAnimation.setEndValue(
-            QColor(["#333333", "#ffffff"][not self.isChecked()]))
-        leftIconColorAnimation.setDuration(self.animationDuration)
-        leftIconColorAnimation.setEasingCurve(QEasingCurve.InOutExpo)
-        leftIconColorAnimation.valueChanged.connect(
-            self.updateLeftIconColor)
-        return leftIconColorAnimation
-
-    def getRightIconColorAnimation(self) -> QVariantAnimation:
-        rightIconColorAnimation = QVariantAnimation(self)
-        rightIconColorAnimation.setStartValue(self.rightIconColor)
-        rightIconColorAnimation.setEndValue(
-            QColor(["#333333", "#ffffff"][self.isChecked()]))
-        rightIconColorAnimation.setDuration(self.animationDuration)
-        rightIconColorAnimation.setEasingCurve(QEasingCurve.InOutExpo)
-        rightIconColorAnimation.valueChanged.connect(
-            self.updateRightIconColor)
-        return rightIconColorAnimation
+        self.keyframes: Optional[KeyframeTable] = None
+        self.timeline: Optional[Timeline] = None
+        # PAUSE THE ANIMATIONS WHILE THE BUTTON CANNOT BE SEEN
+        self.visibilityGuard = VisibilityGuard(self)
+
+    def getKeyframes(self) -> dict:
+        # THE RECT FIRST GROWS (OR SHRINKS FROM THE LEFT), THEN MOVES WHILE THE ICONS CHANGE COLOR
+        duration = self.animationDuration
+        if self.isChecked():
+            tracks = {
+                "blackRectWidth": [[0, self.blackRectWidth], [duration, self.width()]],
+                "blackRectXPos": [[duration, self.blackRectXPos], [2 * duration, self.width() // 2]],
+                "leftIconColor": [[duration, self.leftIconColor], [2 * duration, "#333333"]],
+                "rightIconColor": [[duration, self.rightIconColor], [2 * duration, "#ffffff"]],
+            }
+        else:
+            tracks = {
+                "blackRectXPos": [[0, self.blackRectXPos], [duration, 0]],
+                "blackRectWidth": [[duration, self.blackRectWidth], [2 * duration, self.height()]],
+                "leftIconColor": [[duration, self.leftIconColor], [2 * duration, "#ffffff"]],
+                "rightIconColor": [[duration, self.rightIconColor], [2 * duration, "#333333"]],
+            }
+        return {"easing": "InOutExpo", "tracks": tracks}
 
     def startAnimations(self) -> None:
-        parGroup1 = QParallelAnimationGroup(self)
-        match self.isChecked():
-            case True:
-                parGroup1.addAnimation(self.getBlackRectWidthAnimation())
-            case False:
-                parGroup1.addAnimation(self.getBlackRectXPosAnimation())
-
-        parGroup2 = QParallelAnimationGroup(self)
-        match self.isChecked():
-            case True:
-                parGroup2.addAnimation(self.getBlackRectXPosAnimation())
-            case False:
-                parGroup2.addAnimation(self.getBlackRectWidthAnimation())
-        parGroup2.addAnimation(self.getLeftIconColorAnimation())
-        parGroup2.addAnimation(self.getRightIconColorAnimation())
-
-        secGroup = QSequentialAnimationGroup(self)
-        secGroup.addAnimation(parGroup1)
-        secGroup.addAnimation(parGroup2)
-        secGroup.finished.connect(lambda: self.setDisabled(False))
-        secGroup.start()
-
-    def updateBlackRectWidth(self, newValue) -> None:
-        self.blackRectWidth = newValue
-        self.update()
-
-    def updateBlackRectXPos(self, newValue) -> None:
-        self.blackRectXPos = newValue
-        self.update()
-
-    def updateLeftIconColor(self, newColor) -> None:
-        self.leftIconColor = newColor
-        self.update()
-
-    def updateRightIconColor(self, newColor) -> None:
-        self.rightIconColor = newColor
-        self.update()
+        # A NEW CLICK TAKES OVER FROM THE CURRENT VALUES
+        if self.timeline is not None:
+            animation_clock.remove(self.timeline)
+        self.keyframes = KeyframeTable.compile(self.getKeyframes())
+        self.timeline = animation_clock.start(
+            self, self.keyframes.duration, self.updateKeyframes,
+            end_value=self.keyframes.duration, finished=self.animationsFinished)
+
+    def updateKeyframes(self, time) -> None:
+        # ALL PROPERTIES IN ONE KEYFRAME EVALUATION, THE CLOCK REPAINTS ONCE
+        for name, value in self.keyframes.values_at(time).items():
+            setattr(self, name, value)
+
+    def animationsFinished(self) -> None:
+        self.timeline = None
+        self.setDisabled(False)
 
     def addShadow(self) -> None:
         self.shadow = QGraphicsDropShadowEffect()
@@ -1,113 +1,851 @@
-from PySide6.QtCore import QPointF, QLineF
-from PySide6.QtGui import QPainterPath
+import hashlib
+import json
+import math
+import struct
+import weakref
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from functools import cached_property
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
 
-# TODO: code clean up
-class TrimmablePainterPath(QPainterPath):
-    @staticmethod
-    def trim(path: QPainterPath, start_percentage: float, end_percentage: float) -> QPainterPath:
+import numpy as np
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QPainterPath, QPolygonF
+
+from BezierArray import GAUSS_LEGENDRE_NODES, GAUSS_LEGENDRE_WEIGHTS, BezierArray
+from Polylines import polygon_from_array
+
+LINE_SEGMENT = 1
+CUBIC_SEGMENT = 3
+
+# Error bound of QBezier.length (ToggleButton-01) and of callers that want
+# cubic_length bounded; it costs about two and a half times the unbounded default
+CUBIC_LENGTH_ERROR = 0.01
+
+# Binary format of prepared paths, see save_prepared_paths
+PREPARED_PATHS_MAGIC = b"TPPATHS\0"
+PREPARED_PATHS_VERSION = 2
+PREPARED_PATHS_HEADER = struct.Struct("<8sII")
+
+# BezierArray's Gauss-Legendre nodes and weights as floats, for speed_integral
+GAUSS_LEGENDRE = tuple(zip(GAUSS_LEGENDRE_NODES.tolist(), GAUSS_LEGENDRE_WEIGHTS.tolist()))
+
+
+def lerp(a: float, b: float, u: float) -> float:
+    return a + (b - a) * u
+
+
+def split_cubic(points: Tuple[float, ...], u: float) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    x0, y0, x1, y1, x2, y2, x3, y3 = points
+
+    rx0, ry0 = lerp(x0, x1, u), lerp(y0, y1, u)
+    rx1, ry1 = lerp(x1, x2, u), lerp(y1, y2, u)
+    rx2, ry2 = lerp(x2, x3, u), lerp(y2, y3, u)
+
+    sx0, sy0 = lerp(rx0, rx1, u), lerp(ry0, ry1, u)
+    sx1, sy1 = lerp(rx1, rx2, u), lerp(ry1, ry2, u)
+
+    tx0, ty0 = lerp(sx0, sx1, u), lerp(sy0, sy1, u)
+
+    return (x0, y0, rx0, ry0, sx0, sy0, tx0, ty0), (tx0, ty0, sx1, sy1, rx2, ry2, x3, y3)
+
+
+def speed_integral(ax: float, ay: float, bx: float, by: float, cx: float, cy: float,
+                   u0: float, u1: float) -> float:
+    """Gauss-Legendre integral of |B'(u)| = |(a*u + b)*u + c| over [u0, u1]."""
+    h = u1 - u0
+    total = 0.0
+    for node, weight in GAUSS_LEGENDRE:
+        u = u0 + h * node
+        dx = (ax * u + bx) * u + cx
+        dy = (ay * u + by) * u + cy
+        total += weight * (dx * dx + dy * dy) ** .5
+    return total * h
+
+
+def real_cubic_roots(a: float, b: float, c: float, d: float) -> List[float]:
+    """Real roots of a*u^3 + b*u^2 + c*u + d, lower degrees included."""
+    if abs(a) <= 1e-12 * (abs(b) + abs(c) + abs(d)):
+        if abs(b) <= 1e-12 * (abs(c) + abs(d)):
+            return [-d / c] if c else []
+        discriminant = c * c - 4 * b * d
+        if discriminant < 0:
+            return []
+        root = discriminant ** .5
+        return [(-c - root) / (2 * b), (-c + root) / (2 * b)]
+    # depressed cubic t^3 + p*t + q with u = t - b / 3a
+    b, c, d = b / a, c / a, d / a
+    shift = -b / 3
+    p = c - b * b / 3
+    q = 2 * b * b * b / 27 - b * c / 3 + d
+    discriminant = q * q / 4 + p * p * p / 27
+    if discriminant > 0:
+        root = discriminant ** .5
+        return [math.copysign(abs(-q / 2 + root) ** (1 / 3), -q / 2 + root)
+                + math.copysign(abs(-q / 2 - root) ** (1 / 3), -q / 2 - root) + shift]
+    if p == 0:
+        return [shift]
+    m = 2 * (-p / 3) ** .5
+    theta = math.acos(max(-1.0, min(1.0, 3 * q / (p * m)))) / 3
+    return [m * math.cos(theta - 2 * math.pi * k / 3) + shift for k in range(3)]
+
+
+def cubic_length(points: Tuple[float, ...], error: Optional[float] = None) -> float:
+    """
+    Arc length of a cubic bezier given as (x0, y0, ..., x3, y3), computed with
+    fixed-order Gauss-Legendre quadrature on plain floats.
+
+    The speed |B'(u)| is smooth except where it nearly vanishes, at cusps
+    and sharp turns, which is where a fixed order goes wrong. The parameter
+    interval is therefore cut at the local minima of the speed (the roots
+    of d/du |B'(u)|^2, a cubic) and every piece is integrated on its own.
+    That stays within a tenth of a pixel on curves a few hundred pixels
+    long, closer than QPainterPath.length and at less than half the cost of
+    halving adaptively. When error is given every piece is also halved
+    until two consecutive estimates agree within its share of it.
+    """
+    x0, y0, x1, y1, x2, y2, x3, y3 = points
+    # B'(u) = a*u^2 + b*u + c
+    ax, ay = 3 * (-x0 + 3 * x1 - 3 * x2 + x3), 3 * (-y0 + 3 * y1 - 3 * y2 + y3)
+    bx, by = 6 * (x0 - 2 * x1 + x2), 6 * (y0 - 2 * y1 + y2)
+    cx, cy = 3 * (x1 - x0), 3 * (y1 - y0)
+
+    # d/du |B'(u)|^2 / 2 = k3*u^3 + k2*u^2 + k1*u + k0, minima where it rises through 0
+    k3, k2 = 2 * (ax * ax + ay * ay), 3 * (ax * bx + ay * by)
+    k1, k0 = bx * bx + by * by + 2 * (ax * cx + ay * cy), bx * cx + by * cy
+    cuts = [u for u in sorted(real_cubic_roots(k3, k2, k1, k0))
+            if 0.0 < u < 1.0 and (3 * k3 * u + 2 * k2) * u + k1 > 0]
+    cuts.append(1.0)
+
+    length = 0.0
+    u0 = 0.0
+    for u1 in cuts:
+        whole = speed_integral(ax, ay, bx, by, cx, cy, u0, u1)
+        if error is None:
+            length += whole
+        else:
+            length += refined_speed_integral(ax, ay, bx, by, cx, cy, u0, u1, whole, error / len(cuts))
+        u0 = u1
+    return length
+
+
+def refined_speed_integral(ax: float, ay: float, bx: float, by: float, cx: float, cy: float,
+                           u0: float, u1: float, whole: float, error: float) -> float:
+    """speed_integral over [u0, u1], halving the interval until the halves agree with it within error."""
+    length = 0.0
+    stack = [(u0, u1, whole, error)]
+    while stack:
+        u0, u1, whole, interval_error = stack.pop()
+        middle = (u0 + u1) / 2
+        left = speed_integral(ax, ay, bx, by, cx, cy, u0, middle)
+        right = speed_integral(ax, ay, bx, by, cx, cy, middle, u1)
+        if abs(left + right - whole) <= interval_error or u1 - u0 < 1 / 1024:
+            length += left + right
+        else:
+            stack.append((u0, middle, left, interval_error / 2))
+            stack.append((middle, u1, right, interval_error / 2))
+    return length
+
+
+def sub_cubic(points: Tuple[float, ...], u0: float, u1: float) -> Tuple[float, ...]:
+    """Return the part of a cubic bezier between parameters u0 and u1."""
+    if u1 < 1.0:
+        points = split_cubic(points, u1)[0]
+    if u0 > 0.0:
+        points = split_cubic(points, u0 / u1 if u1 > 0.0 else 0.0)[1]
+    return points
+
+
+def path_fingerprint(path: QPainterPath) -> bytes:
+    """
+    Digest of the path element types and coordinates, equal for paths with
+    the same geometry in every process, so it can be saved with the path.
+    """
+    elements = [path.elementAt(i) for i in range(path.elementCount())]
+    types = bytes(element.type.value for element in elements)
+    coordinates = np.array([(element.x, element.y) for element in elements], dtype="<f8")
+    return hashlib.blake2b(types + coordinates.tobytes(), digest_size=16).digest()
+
+
+def ends_meet(first_points: Tuple[float, ...], last_points: Tuple[float, ...]) -> bool:
+    """True when a segment run starting with first_points ends where it started."""
+    return abs(first_points[0] - last_points[-2]) < 1e-6 and abs(first_points[1] - last_points[-1]) < 1e-6
+
+
+class ArrayView(Sequence):
+    """
+    Read-only sequence over a NumPy array, usually a view on a memory map,
+    turning only the items actually read into Python values.
+    """
+
+    def __init__(self, array: np.ndarray) -> None:
+        self.array = array
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __getitem__(self, index: int):
+        return self.array[index].item()
+
+    def __iter__(self) -> Iterator:
+        return iter(self.array.tolist())
+
+
+class SegmentPointsView(ArrayView):
+    """The (N, 8) control point rows of a segment table, as the tuples PreparedPainterPath.points holds."""
+
+    def __init__(self, points: np.ndarray, types: np.ndarray) -> None:
+        super().__init__(points)
+        self.types = types
+
+    def __getitem__(self, index: int) -> Tuple[float, ...]:
+        row = tuple(self.array[index].tolist())
+        return row[:4] if self.types[index] == LINE_SEGMENT else row
+
+    def __iter__(self) -> Iterator[Tuple[float, ...]]:
+        return (self[index] for index in range(len(self)))
+
+
+class PreparedPainterPath:
+    """
+    A QPainterPath flattened once into a list of line and cubic segments with
+    a cumulative length table, so that trimming only has to binary-search the
+    table and walk the segments it keeps.
+
+    Every element type of QPainterPath is covered: quadratic curves are
+    stored by Qt as cubics, closeSubpath() adds the closing line, and each
+    moveTo starts a new subpath in the same segment table. Paths with
+    several subpaths can be trimmed as one continuous stroke or with the
+    window applied to every subpath individually.
+    """
+
+    def __init__(self, path: QPainterPath) -> None:
+        self.path = QPainterPath(path)
+        self.fingerprint = path_fingerprint(path)
+        self.element_count = path.elementCount()
+        self.types: List[int] = []
+        self.points: List[Tuple[float, ...]] = []
+        self.starts_subpath: List[bool] = []
+        self.lengths: List[float] = []
+        self.cumulative: List[float] = [0.0]
+
+        new_subpath = True
+        x, y = 0.0, 0.0
+        i = 0
+        while i < path.elementCount():
+            element: QPainterPath.Element = path.elementAt(i)
+            if element.isMoveTo():
+                x, y = element.x, element.y
+                new_subpath = True
+                i += 1
+                continue
+
+            if element.isLineTo():
+                points = (x, y, element.x, element.y)
+                segment_length = ((element.x - x) ** 2 + (element.y - y) ** 2) ** .5
+                self.add_segment(LINE_SEGMENT, points, segment_length, new_subpath)
+                i += 1
+            else:
+                c1, c2 = path.elementAt(i + 1), path.elementAt(i + 2)
+                points = (x, y, element.x, element.y, c1.x, c1.y, c2.x, c2.y)
+                self.add_segment(CUBIC_SEGMENT, points, cubic_length(points), new_subpath)
+                i += 3
+
+            x, y = points[-2], points[-1]
+            new_subpath = False
+
+        # A closed path ends where it starts, so a window wrapping past 1.0 can
+        # continue from the first segment without a moveTo. A trailing moveTo
+        # does not count as the end of the path.
+        self.closed = bool(self.points) and ends_meet(self.points[0], self.points[-1])
+        self.cumulative_array = np.asarray(self.cumulative, dtype=np.float64)
+        self.lengths_array = np.asarray(self.lengths, dtype=np.float64)
+        self.index_subpaths()
+
+    @classmethod
+    def from_arrays(cls, types: np.ndarray, starts_subpath: np.ndarray, points: np.ndarray,
+                    cumulative: np.ndarray, closed: bool, fingerprint: bytes,
+                    element_count: int) -> "PreparedPainterPath":
+        """
+        Rebuild a prepared path from its segment table without measuring
+        anything. points is an (N, 8) array where lines only use the first
+        four columns; the source QPainterPath is rebuilt on first access.
+        The arrays are kept as they are, views on a memory map included, and
+        segments are only turned into Python values when they are read.
+        """
+        prepared_path = cls.__new__(cls)
+        prepared_path.fingerprint = fingerprint
+        prepared_path.element_count = element_count
+        prepared_path.closed = closed
+        prepared_path.types = ArrayView(types)
+        prepared_path.starts_subpath = ArrayView(starts_subpath.view(bool))
+        prepared_path.points = SegmentPointsView(points, types)
+        prepared_path.cumulative_array = cumulative
+        prepared_path.lengths_array = np.diff(cumulative)
+        prepared_path.cumulative = ArrayView(cumulative)
+        prepared_path.lengths = ArrayView(prepared_path.lengths_array)
+        prepared_path.index_subpaths()
+        return prepared_path
+
+    def index_subpaths(self) -> None:
+        """Record the first and last segment of every subpath and whether it is closed."""
+        firsts = np.flatnonzero(np.asarray(self.starts_subpath, dtype=bool)).tolist()
+        lasts = [index - 1 for index in firsts[1:]] + [self.segment_count() - 1]
+        self.subpaths: List[Tuple[int, int]] = list(zip(firsts, lasts))
+        self.subpath_closed: List[bool] = [ends_meet(self.points[first], self.points[last])
+                                           for first, last in self.subpaths]
+
+    @cached_property
+    def curves(self) -> BezierArray:
+        """Every segment as a cubic (lines degree-elevated), for batched geometry work."""
+        return BezierArray.from_segments(self.points)
+
+    @cached_property
+    def path(self) -> QPainterPath:
+        path = QPainterPath()
+        for index in range(self.segment_count()):
+            self.append_segment(path, index, 0.0, 1.0, self.starts_subpath[index])
+        return path
+
+    def add_segment(self, segment_type: int, points: Tuple[float, ...],
+                    segment_length: float, starts_subpath: bool) -> None:
+        self.types.append(segment_type)
+        self.points.append(points)
+        self.starts_subpath.append(starts_subpath)
+        self.lengths.append(segment_length)
+        self.cumulative.append(self.cumulative[-1] + segment_length)
+
+    def length(self) -> float:
+        return self.cumulative[-1]
+
+    def segment_count(self) -> int:
+        return len(self.types)
+
+    def segment_range(self, start_length: float, end_length: float, wraps: bool = False,
+                      lowest: int = 0, highest: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Indices of the first and last segments touched by [start_length,
+        end_length], searching only the segments from lowest to highest.
+        """
+        last = self.segment_count() - 1 if highest is None else highest
+        first_index = min(max(bisect_right(self.cumulative, start_length, lowest, last + 2) - 1, lowest), last)
+        last_index = min(max(bisect_left(self.cumulative, end_length, lowest + 1, last + 2) - 1, lowest), last)
+        if not wraps:
+            last_index = max(last_index, first_index)
+        return first_index, last_index
+
+    def local_parameter(self, index: int, length: float) -> float:
+        segment_length = self.lengths[index]
+        if segment_length <= 0.0:
+            return 0.0
+        return min(max((length - self.cumulative[index]) / segment_length, 0.0), 1.0)
+
+    def trim(self, start_percentage: float, end_percentage: float,
+             individually: bool = False) -> QPainterPath:
+        """
+        Return the part of the path between the two percentages. When start is
+        greater than end the window wraps around through the end of the path;
+        on a closed path the result is then one continuous subpath. With
+        individually set, the percentages apply to each subpath on its own
+        rather than to the whole path.
+        """
         if start_percentage < 0.0 or start_percentage > 1.0 or end_percentage < 0.0 or end_percentage > 1.0:
             raise ValueError("Percentage values must be between 0 and 1.")
-        if start_percentage == end_percentage:
-            return QPainterPath()
-
         trimmed_path = QPainterPath()
-        total_length = path.length()
-        # Calculate the start and end points based on percentages
-        start_length = total_length * start_percentage
-        end_length = total_length * end_percentage
-        current_length = 0
+        if start_percentage == end_percentage or not self.types:
+            return trimmed_path
 
-        i = 0
-        while i < path.elementCount() and current_length < end_length:
-            path_element: QPainterPath.Element = path.elementAt(i)
-            element_type = 0
-            if path_element.isLineTo():
-                element_type = 1
-            elif path_element.isCurveTo():
-                element_type = 3
-
-            if not path_element.isMoveTo():
-                segment_length = 0
-                if path_element.isLineTo():
-                    segment = QLineF(path.elementAt(i-1), path_element)
-                    segment_length = segment.length()
-                elif path_element.isCurveTo():
-                    p0, p1, p2, p3 = [QPointF(path.elementAt(j).x, path.elementAt(j).y) for j in range(i-1, i+3)]
-
-                    bezier_path = QPainterPath()
-                    bezier_path.moveTo(p0)
-                    bezier_path.cubicTo(p1, p2, p3)
-                    segment_length = bezier_path.length()
-
-                if current_length < start_length and current_length + segment_length <= start_length:
-                    current_length += segment_length
-                    i += element_type
+        wraps = start_percentage > end_percentage
+        if individually:
+            for (lowest, highest), closed in zip(self.subpaths, self.subpath_closed):
+                subpath_start = self.cumulative[lowest]
+                subpath_length = self.cumulative[highest + 1] - subpath_start
+                if subpath_length <= 0.0:
                     continue
+                start_length = subpath_start + subpath_length * start_percentage
+                end_length = subpath_start + subpath_length * end_percentage
+                first_index, last_index = self.segment_range(start_length, end_length, wraps, lowest, highest)
+                self.append_window(trimmed_path, first_index, last_index,
+                                   self.local_parameter(first_index, start_length),
+                                   self.local_parameter(last_index, end_length), wraps,
+                                   lowest, highest, closed)
+            return trimmed_path
 
-            if path_element.isMoveTo():
-                trimmed_path.moveTo(path_element.x, path_element.y)
-                i += 1
-            elif path_element.isLineTo():
-                segment = QLineF(path.elementAt(i - 1), path_element)
-                # Segment must be trimmed
-                if current_length <= start_length < current_length + segment_length or current_length <= end_percentage < current_length + segment_length:
-                    _start = (start_length - current_length)/segment_length
-                    if _start < 0:
-                        _start = 0
-                    _end = (end_length - current_length) / segment_length
-                    if _end > 1:
-                        _end = 1
-                    start_point = segment.pointAt(_start)
-                    end_point = segment.pointAt(_end)
-                    trimmed_path.moveTo(start_point)
-                    trimmed_path.lineTo(end_point.x(), end_point.y())
-                    current_length += segment_length
-                    i += element_type
-                # Segment must be added entirely
-                else:
-                    trimmed_path.lineTo(path_element.x, path_element.y)
-                    current_length += segment_length
-                    i += element_type
-            elif path_element.isCurveTo():
-                p0, p1, p2, p3 = [QPointF(path.elementAt(j).x, path.elementAt(j).y) for j in range(i-1, i+3)]
-
-                new_points = None
-                # Segment should be trimmed from right
-                if current_length < start_length:
-                    start_percentage = (start_length - current_length) / segment_length
-                    if start_percentage > 1:
-                        start_percentage = 1
-                    new_points = TrimmablePainterPath.trim_cubic_bezier_curve(start_percentage, p0, p1, p2, p3)[1]
-                # Segment shouldn't be trimmed
-                elif current_length + segment_length <= end_length:
-                    new_points = [p0, p1, p2, p3]
-                # Segment should be trimmed from left
-                else:
-                    end_percentage = (end_length - current_length)/segment_length
-                    new_points = TrimmablePainterPath.trim_cubic_bezier_curve(end_percentage, p0, p1, p2, p3)[0]
-
-                if trimmed_path.isEmpty():
-                    trimmed_path.moveTo(new_points[0])
-                trimmed_path.cubicTo(*new_points[1:])
-                current_length += segment_length
-                i += element_type
+        start_length = self.length() * start_percentage
+        end_length = self.length() * end_percentage
+        first_index, last_index = self.segment_range(start_length, end_length, wraps)
+        self.append_window(trimmed_path, first_index, last_index,
+                           self.local_parameter(first_index, start_length),
+                           self.local_parameter(last_index, end_length), wraps)
         return trimmed_path
 
-    @staticmethod
-    def trim_cubic_bezier_curve(u0, p0, p1, p2, p3):
-        if u0 < 0.0 or u0 > 1.0:
-            raise ValueError("Percentage value must be between 0 and 1.")
+    def trim_many(self, ranges: Union[Sequence[Tuple[float, float]], np.ndarray],
+                  merge: bool = False) -> Union[QPainterPath, List[QPainterPath]]:
+        """
+        Trim several (start, end) windows at once. The split segments and local
+        parameters of every window are found in one vectorized pass over the
+        length table; only the path construction is done per window. Windows
+        with start greater than end wrap around like in trim(). Returns a list
+        of paths, or a single path holding every window when merge is set.
+        """
+        ranges = np.asarray(ranges, dtype=np.float64).reshape(-1, 2)
+        if ((ranges < 0.0) | (ranges > 1.0)).any():
+            raise ValueError("Percentage values must be between 0 and 1.")
 
-        def lerp(p0, p1, u):
-            return (1 - u) * p0 + u * p1
+        paths = [QPainterPath()] if merge else [QPainterPath() for _ in range(len(ranges))]
+        if not self.types or not len(ranges):
+            return paths[0] if merge else paths
 
-        r0 = lerp(p0, p1, u0)
-        r1 = lerp(p1, p2, u0)
-        r2 = lerp(p2, p3, u0)
+        cumulative, lengths = self.cumulative_array, self.lengths_array
+        last = self.segment_count() - 1
+        start_lengths = ranges[:, 0] * self.length()
+        end_lengths = ranges[:, 1] * self.length()
+        first_indices = np.clip(np.searchsorted(cumulative, start_lengths, "right") - 1, 0, last)
+        wraps = ranges[:, 0] > ranges[:, 1]
+        last_indices = np.clip(np.searchsorted(cumulative[1:], end_lengths, "left"), 0, last)
+        last_indices = np.where(wraps, last_indices, np.maximum(last_indices, first_indices))
 
-        s0 = lerp(r0, r1, u0)
-        s1 = lerp(r1, r2, u0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u0 = (start_lengths - cumulative[first_indices]) / lengths[first_indices]
+            u1 = (end_lengths - cumulative[last_indices]) / lengths[last_indices]
+        u0 = np.clip(np.nan_to_num(u0, posinf=0.0, neginf=0.0), 0.0, 1.0)
+        u1 = np.clip(np.nan_to_num(u1, posinf=0.0, neginf=0.0), 0.0, 1.0)
 
-        t0 = lerp(s0, s1, u0)
+        # The segments cut by each window are split in one batch: the first
+        # piece runs from u0 to the end of its segment, or to u1 when the
+        # window starts and ends in the same segment without wrapping.
+        single = (first_indices == last_indices) & ~wraps
+        first_pieces = self.curves[first_indices].segment(u0, np.where(single, u1, 1.0)).to_tuples()
+        last_pieces = self.curves[last_indices].segment(0.0, u1).to_tuples()
+
+        non_empty = (ranges[:, 0] != ranges[:, 1]).tolist()
+        for k, (first_index, last_index, start_u, end_u, window_wraps) in enumerate(zip(
+                first_indices.tolist(), last_indices.tolist(), u0.tolist(), u1.tolist(), wraps.tolist())):
+            if non_empty[k]:
+                self.append_window(paths[0 if merge else k], first_index, last_index,
+                                   start_u, end_u, window_wraps,
+                                   first_points=first_pieces[k],
+                                   last_points=first_pieces[k] if single[k] else last_pieces[k])
+        return paths[0] if merge else paths
+
+    def append_window(self, trimmed_path: QPainterPath, first_index: int, last_index: int,
+                      u0: float, u1: float, wraps: bool, lowest: int = 0,
+                      highest: Optional[int] = None, closed: Optional[bool] = None,
+                      first_points: Optional[Tuple[float, ...]] = None,
+                      last_points: Optional[Tuple[float, ...]] = None) -> None:
+        """
+        Append a window found by segment_range. A wrapping window runs to the
+        highest segment and continues from the lowest one, without a moveTo
+        in between when that run of segments is closed. first_points and
+        last_points are the already split first and last pieces, as cubic
+        control points, when the caller computed them in a batch.
+        """
+        if not wraps:
+            self.append_range(trimmed_path, first_index, last_index, u0, u1, True,
+                              first_points, last_points)
+            return
+
+        move = True
+        highest = self.segment_count() - 1 if highest is None else highest
+        closed = self.closed if closed is None else closed
+        if first_index < highest or u0 < 1.0:
+            self.append_range(trimmed_path, first_index, highest, u0, 1.0, True, first_points)
+            move = not closed
+        if last_index > lowest or u1 > 0.0:
+            self.append_range(trimmed_path, lowest, last_index, 0.0, u1, move, None, last_points)
+
+    def append_range(self, trimmed_path: QPainterPath, first_index: int, last_index: int,
+                     u0: float, u1: float, move: bool,
+                     first_points: Optional[Tuple[float, ...]] = None,
+                     last_points: Optional[Tuple[float, ...]] = None) -> None:
+        for index in range(first_index, last_index + 1):
+            points = None
+            if index == first_index and first_points is not None:
+                points = first_points
+            elif index == last_index:
+                points = last_points
+            self.append_segment(trimmed_path, index,
+                                u0 if index == first_index else 0.0,
+                                u1 if index == last_index else 1.0,
+                                move if index == first_index else self.starts_subpath[index],
+                                points)
+
+    def append_segment(self, trimmed_path: QPainterPath, index: int,
+                       u0: float, u1: float, move: bool,
+                       points: Optional[Tuple[float, ...]] = None) -> None:
+        if self.types[index] == LINE_SEGMENT:
+            if points is None:
+                x0, y0, x1, y1 = self.points[index]
+                points = (lerp(x0, x1, u0), lerp(y0, y1, u0), lerp(x0, x1, u1), lerp(y0, y1, u1))
+            if move:
+                trimmed_path.moveTo(points[0], points[1])
+            trimmed_path.lineTo(points[-2], points[-1])
+        else:
+            if points is None:
+                points = self.points[index]
+                if u0 > 0.0 or u1 < 1.0:
+                    points = sub_cubic(points, u0, u1)
+            if move:
+                trimmed_path.moveTo(points[0], points[1])
+            trimmed_path.cubicTo(*points[2:])
+
+
+def save_prepared_paths(filename: str, paths: Mapping[str, PreparedPainterPath]) -> None:
+    """
+    Write prepared paths to one file: a header, a JSON index, then for every
+    path its segment types and subpath flags as uint8 and its control points
+    (N x 8) and cumulative lengths as float32, each array 16-byte aligned so
+    load_prepared_paths can view them straight out of a memory map.
+    """
+    index, chunks, offset = [], [], 0
+
+    def add_array(array: np.ndarray) -> int:
+        nonlocal offset
+        array_offset = offset
+        data = np.ascontiguousarray(array).tobytes()
+        padding = -len(data) % 16
+        chunks.append(data + b"\0" * padding)
+        offset += len(data) + padding
+        return array_offset
+
+    for name, prepared_path in paths.items():
+        count = prepared_path.segment_count()
+        points = np.zeros((count, 8), dtype="<f4")
+        for row, segment_points in enumerate(prepared_path.points):
+            points[row, :len(segment_points)] = segment_points
+        index.append({
+            "name": name,
+            "segments": count,
+            "closed": prepared_path.closed,
+            "fingerprint": prepared_path.fingerprint.hex(),
+            "elements": prepared_path.element_count,
+            "types": add_array(np.asarray(prepared_path.types, dtype=np.uint8)),
+            "starts_subpath": add_array(np.asarray(prepared_path.starts_subpath, dtype=np.uint8)),
+            "points": add_array(points),
+            "cumulative": add_array(np.asarray(prepared_path.cumulative, dtype="<f4")),
+        })
+
+    index_data = json.dumps(index).encode("utf-8")
+    index_data += b" " * (-(PREPARED_PATHS_HEADER.size + len(index_data)) % 16)
+    with open(filename, "wb") as file:
+        file.write(PREPARED_PATHS_HEADER.pack(PREPARED_PATHS_MAGIC, PREPARED_PATHS_VERSION, len(index_data)))
+        file.write(index_data)
+        file.writelines(chunks)
+
+
+def load_prepared_paths(filename: str) -> Dict[str, PreparedPainterPath]:
+    """
+    Memory-map a file written by save_prepared_paths. The segment tables stay
+    views on the shared mapping and no segment is measured again.
+    """
+    data = np.memmap(filename, dtype=np.uint8, mode="r")
+    magic, version, index_size = PREPARED_PATHS_HEADER.unpack(data[:PREPARED_PATHS_HEADER.size].tobytes())
+    if magic != PREPARED_PATHS_MAGIC or version != PREPARED_PATHS_VERSION:
+        raise ValueError("%s is not a prepared paths file of version %d." % (filename, PREPARED_PATHS_VERSION))
+    start = PREPARED_PATHS_HEADER.size + index_size
+    index = json.loads(data[PREPARED_PATHS_HEADER.size:start].tobytes().decode("utf-8"))
+
+    def view(offset: int, dtype: str, shape: Tuple[int, ...]) -> np.ndarray:
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return data[start + offset:start + offset + size].view(dtype).reshape(shape)
+
+    paths = {}
+    for entry in index:
+        count = entry["segments"]
+        paths[entry["name"]] = PreparedPainterPath.from_arrays(
+            view(entry["types"], "u1", (count,)),
+            view(entry["starts_subpath"], "u1", (count,)),
+            view(entry["points"], "<f4", (count, 8)),
+            view(entry["cumulative"], "<f4", (count + 1,)),
+            entry["closed"], bytes.fromhex(entry["fingerprint"]), entry["elements"])
+    return paths
+
+
+class IncrementalTrimmer:
+    """
+    Stateful trimmer for windows that only move forward, like a stroke being
+    drawn on. It keeps the segment cursors of the previous window and the
+    path of the whole segments between them: when the end advances the newly
+    covered segments are appended, and the inner path is only rebuilt when
+    the start crosses into another segment. Any backward move or wrapping
+    window falls back to a full trim.
+    """
+
+    def __init__(self, path: Union[QPainterPath, PreparedPainterPath]) -> None:
+        if not isinstance(path, PreparedPainterPath):
+            path = PreparedPainterPath(path)
+        self.prepared_path = path
+        self.fingerprint = path.fingerprint
+        self.element_count = path.element_count
+        self.reset()
+
+    def reset(self) -> None:
+        self.start_length = -1.0
+        self.end_length = -1.0
+        self.first_index = 0
+        self.last_index = 0
+        self.body = QPainterPath()
+        self.body_first = self.body_end = 0
+
+    def advance(self, start_length: float, end_length: float) -> None:
+        cumulative = self.prepared_path.cumulative
+        last = self.prepared_path.segment_count() - 1
+        if start_length < self.start_length or end_length < self.end_length:
+            self.reset()
+            self.first_index, self.last_index = self.prepared_path.segment_range(start_length, end_length)
+        else:
+            while self.first_index < last and cumulative[self.first_index + 1] <= start_length:
+                self.first_index += 1
+            self.last_index = max(self.last_index, self.first_index)
+            while self.last_index < last and cumulative[self.last_index + 1] < end_length:
+                self.last_index += 1
+        self.start_length, self.end_length = start_length, end_length
+
+        # The body holds the whole segments strictly between the two cursors
+        if self.body_first != self.first_index + 1:
+            self.body = QPainterPath()
+            self.body_first = self.body_end = self.first_index + 1
+        for index in range(self.body_end, self.last_index):
+            self.prepared_path.append_segment(self.body, index, 0.0, 1.0,
+                                              index == self.body_first or self.prepared_path.starts_subpath[index])
+        self.body_end = max(self.body_end, self.last_index)
+
+    def trim(self, start_percentage: float, end_percentage: float) -> QPainterPath:
+        prepared_path = self.prepared_path
+        if start_percentage < 0.0 or start_percentage > 1.0 or end_percentage < 0.0 or end_percentage > 1.0:
+            raise ValueError("Percentage values must be between 0 and 1.")
+        if start_percentage >= end_percentage or not prepared_path.types:
+            return prepared_path.trim(start_percentage, end_percentage)
+
+        self.advance(prepared_path.length() * start_percentage, prepared_path.length() * end_percentage)
+        first_index, last_index = self.first_index, self.last_index
+        u0 = prepared_path.local_parameter(first_index, self.start_length)
+        u1 = prepared_path.local_parameter(last_index, self.end_length)
+
+        trimmed_path = QPainterPath()
+        prepared_path.append_segment(trimmed_path, first_index, u0, 1.0 if last_index > first_index else u1, True)
+        if not self.body.isEmpty():
+            if prepared_path.starts_subpath[self.body_first]:
+                trimmed_path.addPath(self.body)
+            else:
+                trimmed_path.connectPath(self.body)
+        if last_index > first_index:
+            prepared_path.append_segment(trimmed_path, last_index, 0.0, u1, prepared_path.starts_subpath[last_index])
+        return trimmed_path
+
+
+class FlattenedPainterPath:
+    """
+    A prepared path flattened once into a polyline stored as NumPy arrays of
+    vertices and cumulative distances. Curves are subdivided so that the
+    polyline stays within max_error device pixels of the curve at the given
+    device pixel ratio. Trimming is a searchsorted on the distances plus the
+    interpolation of the two end points, and returns QPolygonFs ready for
+    QPainter.drawPolyline.
+    """
+
+    def __init__(self, path: Union[QPainterPath, PreparedPainterPath],
+                 device_pixel_ratio: float = 1.0, max_error: float = .25) -> None:
+        if not isinstance(path, PreparedPainterPath):
+            path = PreparedPainterPath(path)
+        self.device_pixel_ratio = device_pixel_ratio
+        self.tolerance = max_error / device_pixel_ratio
+        self.closed = path.closed
+
+        if not path.types:
+            self.vertices = np.zeros((0, 2))
+            self.cumulative = np.zeros(0)
+            self.subpath_starts = np.zeros(0, dtype=np.intp)
+            return
+
+        curves = path.curves
+        chords = curves.chords(self.tolerance)
+
+        # Segments starting a subpath also emit their start point (t = 0)
+        starts = np.asarray(path.starts_subpath, dtype=np.intp)
+        counts = chords + starts
+        segment_indices = np.repeat(np.arange(len(chords)), counts)
+        offsets = np.cumsum(counts) - counts
+        steps = np.arange(counts.sum()) - offsets[segment_indices] + 1 - starts[segment_indices]
+        self.vertices = curves[segment_indices].evaluate(steps / chords[segment_indices])
+
+        self.subpath_starts = offsets[starts.astype(bool)]
+        distances = np.hypot(*np.diff(self.vertices, axis=0).T)
+        distances[self.subpath_starts[1:] - 1] = 0.0
+        self.cumulative = np.concatenate(([0.0], np.cumsum(distances)))
+
+    def length(self) -> float:
+        return float(self.cumulative[-1]) if len(self.cumulative) else 0.0
+
+    def point_at_length(self, index: int, length: float) -> np.ndarray:
+        """Point at the given length on the edge ending at vertex index."""
+        edge_length = self.cumulative[index] - self.cumulative[index - 1]
+        u = min(max((length - self.cumulative[index - 1]) / edge_length, 0.0), 1.0) if edge_length > 0.0 else 0.0
+        return self.vertices[index - 1] + (self.vertices[index] - self.vertices[index - 1]) * u
+
+    def polylines(self, start_length: float, end_length: float) -> List[np.ndarray]:
+        last = len(self.vertices) - 1
+        first_index = min(max(int(np.searchsorted(self.cumulative, start_length, "right")), 1), last)
+        last_index = min(max(int(np.searchsorted(self.cumulative, end_length, "left")), first_index), last)
+        points = np.concatenate((self.point_at_length(first_index, start_length)[None],
+                                 self.vertices[first_index:last_index],
+                                 self.point_at_length(last_index, end_length)[None]))
+        # Vertices starting a new subpath inside the window break the polyline
+        breaks = self.subpath_starts[(self.subpath_starts > first_index) & (self.subpath_starts < last_index)]
+        return np.split(points, breaks - first_index + 1) if len(breaks) else [points]
+
+    def trim_arrays(self, start_percentage: float, end_percentage: float) -> List[np.ndarray]:
+        if start_percentage < 0.0 or start_percentage > 1.0 or end_percentage < 0.0 or end_percentage > 1.0:
+            raise ValueError("Percentage values must be between 0 and 1.")
+        if start_percentage == end_percentage or self.length() <= 0.0:
+            return []
+
+        start_length = self.length() * start_percentage
+        end_length = self.length() * end_percentage
+        if start_percentage < end_percentage:
+            return self.polylines(start_length, end_length)
+
+        tail = self.polylines(start_length, self.length()) if start_percentage < 1.0 else []
+        head = self.polylines(0.0, end_length) if end_percentage > 0.0 else []
+        if tail and head and self.closed:
+            return tail[:-1] + [np.concatenate((tail[-1], head[0][1:]))] + head[1:]
+        return tail + head
+
+    def trim(self, start_percentage: float, end_percentage: float) -> List[QPolygonF]:
+        """Trimmed polylines, one QPolygonF per subpath crossed by the window."""
+        return [polygon_from_array(points) for points in self.trim_arrays(start_percentage, end_percentage)]
+
+
+class TrimCache:
+    """
+    Bounded LRU cache of trimmed paths. Entries are keyed on the path
+    fingerprint and element count and on the start and end percentages rounded to a multiple of
+    resolution; the trim itself is computed at the rounded values so a cached
+    result never depends on which exact value filled the entry.
+
+    The fingerprint of a plain QPainterPath is computed once per path object
+    and element count, then remembered until the object is garbage
+    collected, so trimming the same path every frame does not walk its
+    elements again. A path moved in place (setElementPositionAt) keeps its
+    element count and so its stale fingerprint: trim a new path instead, or
+    a PreparedPainterPath.
+    """
+
+    def __init__(self, max_size: int = 256, resolution: float = 1e-3,
+                 max_paths: int = 32) -> None:
+        if max_size < 1 or max_paths < 1:
+            raise ValueError("Cache sizes must be at least 1.")
+        if resolution <= 0.0:
+            raise ValueError("Resolution must be positive.")
+        self.max_size = max_size
+        self.resolution = resolution
+        self.max_paths = max_paths
+        self.entries: "OrderedDict[Tuple[bytes, int, int, int], QPainterPath]" = OrderedDict()
+        self.prepared_paths: "OrderedDict[Tuple[bytes, int], PreparedPainterPath]" = OrderedDict()
+        # id of a plain path -> (weak reference to it, its key), see path_key
+        self.path_keys: Dict[int, Tuple[weakref.ref, Tuple[bytes, int]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def quantize(self, percentage: float) -> int:
+        return round(percentage / self.resolution)
+
+    def path_key(self, path: Union[QPainterPath, PreparedPainterPath, IncrementalTrimmer]) -> Tuple[bytes, int]:
+        if not isinstance(path, QPainterPath):
+            return path.fingerprint, path.element_count
+        path_id, element_count = id(path), path.elementCount()
+        known = self.path_keys.get(path_id)
+        if known is not None and known[1][1] == element_count:
+            return known[1]
+        key = path_fingerprint(path), element_count
+        # forgotten with the path, before its id can be reused
+        reference = weakref.ref(path, lambda _: self.path_keys.pop(path_id, None))
+        self.path_keys[path_id] = (reference, key)
+        return key
+
+    def prepared(self, path: Union[QPainterPath, PreparedPainterPath, IncrementalTrimmer]
+                 ) -> Union[PreparedPainterPath, IncrementalTrimmer]:
+        if not isinstance(path, QPainterPath):
+            return path
+        key = self.path_key(path)
+        prepared_path = self.prepared_paths.get(key)
+        if prepared_path is None:
+            prepared_path = PreparedPainterPath(path)
+            self.prepared_paths[key] = prepared_path
+            if len(self.prepared_paths) > self.max_paths:
+                self.prepared_paths.popitem(last=False)
+        else:
+            self.prepared_paths.move_to_end(key)
+        return prepared_path
+
+    def trim(self, path: Union[QPainterPath, PreparedPainterPath, IncrementalTrimmer],
+             start_percentage: float, end_percentage: float) -> QPainterPath:
+        if start_percentage < 0.0 or start_percentage > 1.0 or end_percentage < 0.0 or end_percentage > 1.0:
+            raise ValueError("Percentage values must be between 0 and 1.")
+        key = self.path_key(path) + (self.quantize(start_percentage), self.quantize(end_percentage))
+
+        trimmed_path = self.entries.get(key)
+        if trimmed_path is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return QPainterPath(trimmed_path)
+
+        self.misses += 1
+        trimmed_path = self.prepared(path).trim(min(key[2] * self.resolution, 1.0),
+                                                min(key[3] * self.resolution, 1.0))
+        self.entries[key] = trimmed_path
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return QPainterPath(trimmed_path)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "size": len(self.entries)}
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.prepared_paths.clear()
+        self.path_keys.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+# Prepares the plain QPainterPaths given to TrimmablePainterPath.trim, so that
+# trimming the same path again does not measure it again
+trim_cache = TrimCache()
+
+
+class TrimmablePainterPath(QPainterPath):
+    @staticmethod
+    def prepare(path: QPainterPath) -> PreparedPainterPath:
+        return PreparedPainterPath(path)
+
+    @staticmethod
+    def flatten(path: Union[QPainterPath, PreparedPainterPath],
+                device_pixel_ratio: float = 1.0) -> FlattenedPainterPath:
+        return FlattenedPainterPath(path, device_pixel_ratio)
+
+    @staticmethod
+    def trim(path: QPainterPath, start_percentage: float, end_percentage: float,
+             cache: Optional[TrimCache] = None) -> QPainterPath:
+        """
+        A plain QPainterPath is prepared once and looked up by object on
+        later calls (see TrimCache), so keep trimming the same object. A path
+        rebuilt every frame is fingerprinted every frame, walking all of its
+        elements: prepare() it once instead and trim the PreparedPainterPath.
+        """
+        if cache is not None:
+            return cache.trim(path, start_percentage, end_percentage)
+        if isinstance(path, QPainterPath):
+            path = trim_cache.prepared(path)
+        return path.trim(start_percentage, end_percentage)
+
+    @staticmethod
+    def trim_cubic_bezier_curve(u0, p0, p1, p2, p3):
+        if u0 < 0.0 or u0 > 1.0:
+            raise ValueError("Percentage value must be between 0 and 1.")
 
-        return [[p0, r0, s0, t0], [t0, s1, r2, p3]]
+        first, second = split_cubic((p0.x(), p0.y(), p1.x(), p1.y(), p2.x(), p2.y(), p3.x(), p3.y()), u0)
+        return [[QPointF(first[k], first[k + 1]) for k in range(0, 8, 2)],
+                [QPointF(second[k], second[k + 1]) for k in range(0, 8, 2)]]
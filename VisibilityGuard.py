@@ -0,0 +1,126 @@
+from typing import List
+
+import shiboken6
+from PySide6.QtCore import QAbstractAnimation, QElapsedTimer, QEvent, QObject, QTimer
+from PySide6.QtWidgets import QWidget
+
+from AnimationClock import animation_clock
+
+# Interval of Qt's animation timer in milliseconds
+QT_ANIMATION_INTERVAL = 16
+
+# Events after which the widget may have become visible or hidden
+VISIBILITY_EVENTS = (QEvent.Show, QEvent.Hide, QEvent.WindowStateChange, QEvent.Move, QEvent.Resize,
+                     QEvent.ParentChange, QEvent.Expose)
+
+
+class VisibilityGuard(QObject):
+    """
+    Pauses a widget's animations while nobody can see it and resumes them in
+    phase afterwards. The widget counts as hidden when it is not visible, its
+    window is minimized or not exposed (fully obscured on platforms that
+    report it), or its visible region is empty, e.g. scrolled out of a
+    QScrollArea. Running QAbstractAnimations owned by the widget are paused
+    with pause(), and its AnimationClock timelines are held by the clock.
+
+    The widget and its ancestors are watched through an event filter, so no
+    timer runs while the widget is hidden. suppressed_ticks estimates the
+    animation ticks saved so far.
+    """
+
+    # suppressed ticks of every guard, accumulated when a widget resumes
+    total_suppressed_ticks = 0
+
+    def __init__(self, widget: QWidget) -> None:
+        super().__init__(widget)
+        self.widget = widget
+        self.suspended = False
+        self.paused_animations: List[QAbstractAnimation] = []
+        self.paused_timeline_count = 0
+        self.suspended_timer = QElapsedTimer()
+        self.finished_suppressed_ticks = 0
+        self.watched: List[QObject] = []
+        # events often arrive before the geometry they announce is applied,
+        # so the check runs once the event loop is back
+        self.check_timer = QTimer(self)
+        self.check_timer.setSingleShot(True)
+        self.check_timer.setInterval(0)
+        self.check_timer.timeout.connect(self.check)
+        self.watch()
+        # a widget that is never shown gets no event, check it once anyway
+        self.check_timer.start()
+
+    def watch(self) -> None:
+        for watched in self.watched:
+            if shiboken6.isValid(watched):
+                watched.removeEventFilter(self)
+        self.watched = []
+        widget = self.widget
+        while widget is not None:
+            self.watched.append(widget)
+            widget = widget.parentWidget()
+        window_handle = self.widget.window().windowHandle()
+        if window_handle is not None:
+            self.watched.append(window_handle)
+        for watched in self.watched:
+            watched.installEventFilter(self)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() in VISIBILITY_EVENTS:
+            if event.type() in (QEvent.ParentChange, QEvent.Show):
+                # new ancestors, or a window handle created on first show
+                self.watch()
+            self.check_timer.start()
+        return False
+
+    def is_visible(self) -> bool:
+        widget = self.widget
+        if not widget.isVisible():
+            return False
+        window = widget.window()
+        if window.isMinimized():
+            return False
+        window_handle = window.windowHandle()
+        if window_handle is not None and not window_handle.isExposed():
+            return False
+        return not widget.visibleRegion().isEmpty()
+
+    def check(self) -> None:
+        visible = self.is_visible()
+        if self.suspended and visible:
+            self.resume()
+        elif not self.suspended and not visible:
+            self.suspend()
+
+    def suspend(self) -> None:
+        self.suspended = True
+        self.suspended_timer.start()
+        # top level animations only, groups pause their children
+        self.paused_animations = [animation for animation in self.widget.findChildren(QAbstractAnimation)
+                                  if animation.group() is None and animation.state() == QAbstractAnimation.Running]
+        for animation in self.paused_animations:
+            animation.pause()
+        self.paused_timeline_count = len(animation_clock.suspend_widget(self.widget))
+
+    def resume(self) -> None:
+        suppressed_ticks = self.current_suppressed_ticks()
+        self.finished_suppressed_ticks += suppressed_ticks
+        VisibilityGuard.total_suppressed_ticks += suppressed_ticks
+        self.suspended = False
+        for animation in self.paused_animations:
+            if shiboken6.isValid(animation) and animation.state() == QAbstractAnimation.Paused:
+                animation.resume()
+        self.paused_animations = []
+        self.paused_timeline_count = 0
+        animation_clock.resume_widget(self.widget)
+
+    def current_suppressed_ticks(self) -> int:
+        if not self.suspended:
+            return 0
+        elapsed = self.suspended_timer.elapsed()
+        return len(self.paused_animations) * int(elapsed / QT_ANIMATION_INTERVAL) + \
+            self.paused_timeline_count * int(elapsed / animation_clock.timer.interval())
+
+    @property
+    def suppressed_ticks(self) -> int:
+        return self.finished_suppressed_ticks + self.current_suppressed_ticks()
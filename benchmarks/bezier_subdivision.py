@@ -0,0 +1,106 @@
+"""
+Allocation benchmark of ToggleButton-01's QBezier subdivision length.
+
+Runs the recursive QLineF/QPointF implementation QBezier used to have and
+the current iterative one over the same curve for tighter and tighter
+errors, and reports the peak memory tracemalloc sees during one
+measurement. The iterative loop stays flat however deep the subdivision
+goes, the recursive one grows with the depth.
+
+Run from the repository root:
+    python -m benchmarks.bezier_subdivision
+"""
+import importlib.util
+import os
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+
+from PySide6.QtCore import QLineF, QPointF
+
+ERRORS = (1, .1, .01, .001, .0001)
+TOGGLE_BUTTON_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                       "ToggleButton-01", "src")
+
+
+def load_toggle_button_module():
+    spec = importlib.util.spec_from_file_location("ToggleButton01ToggleButton",
+                                                  os.path.join(TOGGLE_BUTTON_DIRECTORY, "ToggleButton.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@dataclass
+class Element:
+    x: float
+    y: float
+
+
+@dataclass
+class RecursiveBezier:
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    x3: float
+    y3: float
+    x4: float
+    y4: float
+
+    def length(self, error):
+        length_list = [0.0]
+        self.add_if_close(length_list, error)
+        return length_list[0]
+
+    def add_if_close(self, length_list, error):
+        len_arc = QLineF(QPointF(self.x1, self.y1), QPointF(self.x2, self.y2)).length() \
+            + QLineF(QPointF(self.x2, self.y2), QPointF(self.x3, self.y3)).length() \
+            + QLineF(QPointF(self.x3, self.y3), QPointF(self.x4, self.y4)).length()
+        chord = QLineF(QPointF(self.x1, self.y1), QPointF(self.x4, self.y4)).length()
+        if (len_arc - chord) > error:
+            first, second = self.split()
+            first.add_if_close(length_list, error)
+            second.add_if_close(length_list, error)
+            return
+        length_list[0] += len_arc
+
+    def split(self):
+        mid1 = Element((self.x1 + self.x2) / 2, (self.y1 + self.y2) / 2)
+        mid2 = Element((self.x2 + self.x3) / 2, (self.y2 + self.y3) / 2)
+        mid3 = Element((self.x3 + self.x4) / 2, (self.y3 + self.y4) / 2)
+        mid4 = Element((mid1.x + mid2.x) / 2, (mid1.y + mid2.y) / 2)
+        mid5 = Element((mid2.x + mid3.x) / 2, (mid2.y + mid3.y) / 2)
+        midpoint = Element((mid4.x + mid5.x) / 2, (mid4.y + mid5.y) / 2)
+        return (RecursiveBezier(self.x1, self.y1, mid1.x, mid1.y, mid4.x, mid4.y, midpoint.x, midpoint.y),
+                RecursiveBezier(midpoint.x, midpoint.y, mid5.x, mid5.y, mid3.x, mid3.y, self.x4, self.y4))
+
+
+def traced_peak(measure):
+    """Peak traced bytes above the baseline during one call of measure."""
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    measure()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - base
+
+
+def main() -> None:
+    points = (Element(0, 0), Element(200, -150), Element(-100, 250), Element(300, 100))
+    bezier = load_toggle_button_module().QBezier(*points)
+    recursive = RecursiveBezier(*(value for point in points for value in (point.x, point.y)))
+    # warm up caches and free lists before tracing
+    bezier.subdivisionLength(ERRORS[-1])
+    recursive.length(ERRORS[-1])
+
+    print("%-8s %-10s %12s %12s %12s" % ("error", "method", "length", "us/call", "peak bytes"))
+    for error in ERRORS:
+        for name, measure in (("recursive", lambda: recursive.length(error)),
+                              ("iterative", lambda: bezier.subdivisionLength(error))):
+            seconds = min(timeit.repeat(measure, number=20, repeat=3)) / 20
+            print("%-8g %-10s %12.4f %12.1f %12d" % (error, name, measure(), seconds * 1e6, traced_peak(measure)))
+
+
+if __name__ == "__main__":
+    main()
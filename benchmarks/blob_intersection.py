@@ -0,0 +1,78 @@
+"""
+Per-frame cost of drawing LoadingIndicator-03's deformed blobs with each
+way of filling their overlap.
+
+Compares QPainterPath.intersected (what the loader used to do every frame)
+with the clip, offscreen composite and radial modes of
+Loader.draw_intersection. Every mode renders the same FRAMES frames into an
+image; the last column is the mean absolute difference from the path mode
+per colour channel (0-255).
+
+Run from the repository root:
+    python -m benchmarks.blob_intersection
+"""
+import importlib.util
+import os
+import sys
+import timeit
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PySide6.QtGui import QColor, QImage, QPainter
+from PySide6.QtWidgets import QApplication
+
+FRAMES = 60
+LOADER_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "LoadingIndicator-03", "src")
+
+
+def load_loader_module():
+    spec = importlib.util.spec_from_file_location("LoadingIndicator03Loader",
+                                                  os.path.join(LOADER_DIRECTORY, "Loader.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def render(loader, image: QImage, start: float) -> None:
+    loader.start = start
+    image.fill(QColor("#333333"))
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setPen(QColor(0, 0, 0, 0))
+    painter.setBrush(QColor("#66FF66"))
+    loader.draw_deformed_circles(painter)
+    painter.end()
+
+
+def pixels(image: QImage) -> np.ndarray:
+    return np.frombuffer(image.constBits(), np.uint8).reshape(-1).astype(float).copy()
+
+
+def main() -> None:
+    app = QApplication.instance() or QApplication(sys.argv)
+    module = load_loader_module()
+    starts = np.linspace(0, 5000, FRAMES).tolist()
+
+    references = []
+    print("%-12s %12s %18s" % ("mode", "ms/frame", "mean diff vs path"))
+    for mode in module.INTERSECTION_MODES:
+        # the same blobs in every mode
+        loader = module.Loader(seed=0, intersection_mode=mode)
+        image = QImage(loader.size(), QImage.Format_ARGB32_Premultiplied)
+        seconds = min(timeit.repeat(lambda: [render(loader, image, start) for start in starts],
+                                    number=1, repeat=3))
+        frames = []
+        for start in starts[::10]:
+            render(loader, image, start)
+            frames.append(pixels(image))
+        if mode == module.INTERSECTION_PATH:
+            references = frames
+        difference = np.mean([np.abs(frame - reference).mean() for frame, reference in zip(frames, references)])
+        print("%-12s %12.3f %18.4f" % (mode, seconds / FRAMES * 1e3, difference))
+    app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-segment cost of measuring a cubic bezier.
+
+Compares building a temporary QPainterPath and calling length() (what
+TrimmablePainterPath.trim used to do for every curve) with the float-only
+Gauss-Legendre cubic_length, unbounded (what PreparedPainterPath uses) and
+with an error bound. The last column is the largest difference, in pixels,
+from cubic_length with a bound of 1e-9.
+
+Run from the repository root:
+    python -m benchmarks.cubic_length
+"""
+import random
+import timeit
+
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QPainterPath
+
+from TrimmablePainterPath import CUBIC_LENGTH_ERROR, cubic_length
+
+SEGMENTS = 2000
+
+
+def random_cubics(count: int):
+    rng = random.Random(0)
+    return [tuple(rng.uniform(0, 500) for _ in range(8)) for _ in range(count)]
+
+
+def painter_path_length(points) -> float:
+    p0, p1, p2, p3 = [QPointF(points[k], points[k + 1]) for k in range(0, 8, 2)]
+    bezier_path = QPainterPath()
+    bezier_path.moveTo(p0)
+    bezier_path.cubicTo(p1, p2, p3)
+    return bezier_path.length()
+
+
+def main() -> None:
+    cubics = random_cubics(SEGMENTS)
+    candidates = {
+        "temporary QPainterPath": painter_path_length,
+        "cubic_length": cubic_length,
+        "cubic_length(error=%g)" % CUBIC_LENGTH_ERROR: lambda points: cubic_length(points, CUBIC_LENGTH_ERROR),
+    }
+    reference = [cubic_length(points, 1e-9) for points in cubics]
+
+    print("%-28s %12s %16s" % ("method", "us/segment", "max error (px)"))
+    for name, measure in candidates.items():
+        seconds = min(timeit.repeat(lambda: [measure(points) for points in cubics], number=1, repeat=5))
+        difference = max(abs(measure(points) - expected) for points, expected in zip(cubics, reference))
+        print("%-28s %12.2f %16.4f" % (name, seconds / SEGMENTS * 1e6, difference))
+
+
+if __name__ == "__main__":
+    main()
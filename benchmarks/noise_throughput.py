@@ -0,0 +1,51 @@
+"""
+Throughput of the noise LoadingIndicator-03 deforms its blobs with.
+
+Compares perlin_noise.PerlinNoise, which evaluates one point per call in
+pure Python (what the loader used to import), with GradientNoise evaluating
+whole arrays in 2D and 3D, and with lookups in a precomputed NoiseTile.
+perlin_noise is optional; its row is skipped when it is not installed.
+
+Run from the repository root:
+    python -m benchmarks.noise_throughput
+"""
+import timeit
+
+import numpy as np
+
+from GradientNoise import GradientNoise
+
+POINTS = 100000
+# perlin_noise takes about 0.1 ms per point, measure it on fewer
+SCALAR_POINTS = 500
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    x, y, z = rng.uniform(-20, 20, (3, POINTS))
+    noise = GradientNoise(seed=0, frequency=.8)
+    tile = GradientNoise(seed=0, frequency=.8, period=16).tile()
+
+    candidates = {
+        "GradientNoise 2D": (lambda: noise(x, y), POINTS),
+        "GradientNoise 3D": (lambda: noise(x, y, z), POINTS),
+        "NoiseTile lookup": (lambda: tile(x, y), POINTS),
+    }
+    try:
+        from perlin_noise import PerlinNoise
+    except ImportError:
+        print("perlin_noise is not installed, skipping it")
+    else:
+        perlin_noise = PerlinNoise(octaves=.8, seed=0)
+        points = list(zip(x[:SCALAR_POINTS].tolist(), y[:SCALAR_POINTS].tolist()))
+        candidates = {"perlin_noise 2D": (lambda: [perlin_noise(point) for point in points], SCALAR_POINTS),
+                      **candidates}
+
+    print("%-20s %16s" % ("method", "points/sec"))
+    for name, (evaluate, count) in candidates.items():
+        seconds = min(timeit.repeat(evaluate, number=1, repeat=5))
+        print("%-20s %16.0f" % (name, count / seconds))
+
+
+if __name__ == "__main__":
+    main()
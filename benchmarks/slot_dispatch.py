@@ -0,0 +1,137 @@
+"""
+Per-frame cost of animating a record of four properties.
+
+Compares ToggleButton-02's former setup, four QVariantAnimations whose
+valueChanged signals each call a Python slot that sets one property and
+requests an update, with PropertyAnimator, which interpolates the four
+properties together and delivers them in one callback per frame. Both play
+the same two-phase toggle, sampled at FRAMES evenly spaced times on WIDGETS
+widgets.
+
+Run from the repository root:
+    python -m benchmarks.slot_dispatch
+"""
+import os
+import timeit
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QEasingCurve, QParallelAnimationGroup, QSequentialAnimationGroup, QVariantAnimation
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QApplication, QWidget
+
+from AnimationClock import AnimationClock
+from PropertyAnimator import PropertyAnimator
+
+DURATION = 800
+FRAMES = 96
+WIDGETS = 50
+
+
+class Record(QWidget):
+    def __init__(self) -> None:
+        super().__init__()
+        self.resize(200, 100)
+        self.blackRectWidth = 100
+        self.blackRectXPos = 0
+        self.leftIconColor = QColor("#ffffff")
+        self.rightIconColor = QColor("#333333")
+        self.dispatches = 0
+
+
+def variant_animations(widget: Record) -> QSequentialAnimationGroup:
+    def animation(name, start, end):
+        def update(value):
+            setattr(widget, name, value)
+            widget.dispatches += 1
+            widget.update()
+        variant_animation = QVariantAnimation(widget)
+        variant_animation.setDuration(DURATION)
+        variant_animation.setEasingCurve(QEasingCurve.InOutExpo)
+        variant_animation.setStartValue(start)
+        variant_animation.setEndValue(end)
+        variant_animation.valueChanged.connect(update)
+        return variant_animation
+
+    grow = QParallelAnimationGroup(widget)
+    grow.addAnimation(animation("blackRectWidth", 100, 200))
+    move = QParallelAnimationGroup(widget)
+    move.addAnimation(animation("blackRectXPos", 0, 100))
+    move.addAnimation(animation("leftIconColor", QColor("#ffffff"), QColor("#333333")))
+    move.addAnimation(animation("rightIconColor", QColor("#333333"), QColor("#ffffff")))
+    group = QSequentialAnimationGroup(widget)
+    group.addAnimation(grow)
+    group.addAnimation(move)
+    return group
+
+
+def property_animator(widget: Record, clock: AnimationClock) -> PropertyAnimator:
+    def apply(values):
+        for name, value in values.items():
+            setattr(widget, name, value)
+        widget.dispatches += 1
+
+    animator = PropertyAnimator(widget, apply, clock)
+    animator.animate({"easing": "InOutExpo", "tracks": {
+        "blackRectWidth": [[0, 100], [DURATION, 200]],
+        "blackRectXPos": [[DURATION, 0], [2 * DURATION, 100]],
+        "leftIconColor": [[DURATION, "#ffffff"], [2 * DURATION, "#333333"]],
+        "rightIconColor": [[DURATION, "#333333"], [2 * DURATION, "#ffffff"]],
+    }})
+    return animator
+
+
+def main() -> None:
+    app = QApplication.instance() or QApplication([])
+    times = [2 * DURATION * (frame + 1) / (FRAMES + 1) for frame in range(FRAMES)]
+
+    widgets = [Record() for _ in range(WIDGETS)]
+    clock_widgets = [Record() for _ in range(WIDGETS)]
+    # the clock reads its time from now[0], so ticks can be driven at will
+    now = [0.0]
+    # rebuilt before every timed run, outside of the timing
+    state = {}
+
+    def setup_variant_animations():
+        state["groups"] = [variant_animations(widget) for widget in widgets]
+        # stopped animations do not emit valueChanged, paused ones follow setCurrentTime
+        for group in state["groups"]:
+            group.start()
+            group.pause()
+
+    def play_variant_animations():
+        for time in times:
+            for group in state["groups"]:
+                group.setCurrentTime(int(time))
+
+    def setup_property_animator():
+        now[0] = 0.0
+        state["clock"] = AnimationClock(time_source=lambda: now[0])
+        state["animators"] = [property_animator(widget, state["clock"]) for widget in clock_widgets]
+
+    def play_property_animator():
+        clock = state["clock"]
+        for time in times:
+            now[0] = time
+            clock.tick()
+
+    candidates = {
+        "QVariantAnimation x4": (setup_variant_animations, play_variant_animations, widgets),
+        "PropertyAnimator": (setup_property_animator, play_property_animator, clock_widgets),
+    }
+    print("%d widgets, %d frames per toggle" % (WIDGETS, FRAMES))
+    print("%-22s %16s %16s %14s" % ("method", "slots/frame", "slots/sec", "us/frame"))
+    for name, (setup, play, played_widgets) in candidates.items():
+        setup()
+        for widget in played_widgets:
+            widget.dispatches = 0
+        play()
+        dispatches = sum(widget.dispatches for widget in played_widgets) / (FRAMES * WIDGETS)
+        seconds = min(timeit.repeat(play, setup, number=1, repeat=5))
+        per_frame = seconds / (FRAMES * WIDGETS)
+        print("%-22s %16.2f %16.0f %14.2f" % (name, dispatches, dispatches / per_frame, per_frame * 1e6))
+    app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import importlib.util
+import os
+import sys
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPOSITORY_DIRECTORY)
+
+from PySide6.QtGui import QPainterPath  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app() -> QApplication:
+    return QApplication.instance() or QApplication([])
+
+
+def load_widget_module(name: str, *path: str):
+    """Import a widget module from one of the demo directories, whose names are not valid packages."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPOSITORY_DIRECTORY, *path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def elements(path: QPainterPath) -> list:
+    """(type, x, y) of every element of path."""
+    return [(path.elementAt(i).type, path.elementAt(i).x, path.elementAt(i).y) for i in range(path.elementCount())]
+
+
+def assert_same_path(path: QPainterPath, expected: QPainterPath) -> None:
+    actual, expected = elements(path), elements(expected)
+    assert [element[0] for element in actual] == [element[0] for element in expected]
+    assert np.allclose([element[1:] for element in actual], [element[1:] for element in expected], atol=1e-6)
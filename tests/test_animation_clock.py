@@ -0,0 +1,72 @@
+from PySide6.QtWidgets import QWidget
+
+from AnimationClock import AnimationClock, Timeline
+from conftest import load_widget_module
+
+
+def make_timeline(events, loop_count=-1) -> Timeline:
+    return Timeline(None, 1000, lambda value: None, loop_count=loop_count, events=events)
+
+
+def advance(timeline: Timeline, elapsed: float):
+    crossed = timeline.crossed_events(elapsed)
+    timeline.last_elapsed = elapsed
+    return crossed
+
+
+def test_crossed_events_across_a_loop():
+    timeline = make_timeline([0, 250, 500])
+    assert advance(timeline, 0) == [(0, 0)]
+    assert advance(timeline, 600) == [(1, 250), (2, 500)]
+    # the event at 0 fires again as the loop wraps, at the wrap time
+    assert advance(timeline, 1300) == [(0, 1000), (1, 1250)]
+    # a late tick skipping whole loops fires every event once per loop, in order
+    assert advance(timeline, 3100) == [(2, 1500), (0, 2000), (1, 2250), (2, 2500), (0, 3000)]
+    assert advance(timeline, 3100) == []
+
+
+def test_crossed_events_stop_at_the_last_loop():
+    timeline = make_timeline([0, 500], loop_count=2)
+    assert advance(timeline, 900) == [(0, 0), (1, 500)]
+    # the end of the last loop is not the start of another
+    assert advance(timeline, 5000) == [(0, 1000), (1, 1500)]
+
+
+def test_tick_fires_events_before_apply(app):
+    now = [0.0]
+    clock = AnimationClock(time_source=lambda: now[0])
+    calls = []
+    clock.start(QWidget(), 1000, lambda value: calls.append(("apply", value)), end_value=1000,
+                loop_count=-1, events=[0, 500], on_event=lambda index, time: calls.append(("event", index, time)))
+    clock.tick()
+    now[0] = 1200
+    clock.tick()
+    assert calls == [("event", 0, 0), ("apply", 0),
+                     ("event", 1, 500), ("event", 0, 1000), ("apply", 200)]
+
+
+def test_loader_offset_tracks_wrap_like_a_turn(app):
+    module = load_widget_module("LoadingIndicator04Loader", "LoadingIndicator-04", "src", "Loader.py")
+    loader = module.Loader()
+    clock = module.animation_clock
+    start = loader.timeline.start_time
+    period = loader.period
+
+    # the animation starts by moving the last square out to rayon, as it always has
+    clock.tick(start)
+    assert loader.index == -1
+    assert loader.offset_ends[-1] == loader.rayon
+
+    # every 30 degrees moves square - 1 towards rayon - 20 * square
+    for square in range(1, module.SQUARE_COUNT):
+        clock.tick(start + period * square / module.SQUARE_COUNT)
+        assert loader.index == square - 1
+        assert loader.offset_ends[square - 1] == loader.rayon - 20 * square
+
+    # 360 degrees is the twelfth square, not the start again
+    clock.tick(start + period + 1)
+    assert loader.index == module.SQUARE_COUNT - 1
+    assert loader.offset_ends[module.SQUARE_COUNT - 1] == loader.rayon - 240
+    assert loader.offset_times[module.SQUARE_COUNT - 1] == period
+
+    clock.remove(loader.timeline)
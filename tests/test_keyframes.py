@@ -0,0 +1,43 @@
+import numpy as np
+from PySide6.QtGui import QColor
+
+from Keyframes import KeyframeTable, pack_colors
+
+DESCRIPTION = {
+    "easing": "InOutExpo",
+    "tracks": {
+        "width": [[0, 100], [800, 200]],
+        "position": [[800, [0, 10]], [1200, [100, 0], "OutBack"], [1600, [50, 50]]],
+        "color": [[800, "#ffffff"], [1600, "#333333"]],
+        "other": [[0, "#000000"], [300, "#ff8000", "Linear"], [1600, "#0000ff"]],
+    },
+}
+
+
+def test_narrow_tables_match_the_vectorized_evaluation():
+    table = KeyframeTable.compile(DESCRIPTION)
+    assert table.timings is not None
+    for time in np.linspace(-100, 1700, 361).tolist():
+        columns = table.evaluate(time)
+        values = table.values_at(time)
+        for name, kind, column in zip(table.names, table.kinds, table.columns):
+            if kind == "color":
+                expected = np.array(QColor.fromRgba(int(pack_colors(columns[column]))).getRgb())
+                # colours are looked up in tables sampled along each segment
+                assert np.abs(np.array(values[name].getRgb()) - expected).max() <= 1
+            else:
+                assert np.allclose(values[name], columns[column].tolist() if kind == "vector" else columns[column][0])
+
+
+def test_still_tracks_and_colours_are_left_out():
+    table = KeyframeTable.compile(DESCRIPTION)
+    assert set(table.values_at(400)) == {"width", "position", "color", "other"}
+    # position and color wait for their first key at 800, other barely
+    # leaves #ff8000 along its InOutExpo segment and keeps its 8-bit value
+    assert set(table.values_at(410, 400)) == {"width"}
+    assert set(table.values_at(1000, 410)) == {"width", "position", "color", "other"}
+    table.values_at(1600)
+    assert table.values_at(1700, 1600) == {}
+    # the first call after another time delivers every colour again
+    assert "color" in table.values_at(1000, 500)
+    assert "color" not in table.values_at(1000, 1000)
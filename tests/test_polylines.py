@@ -0,0 +1,27 @@
+import math
+
+import numpy as np
+
+from Polylines import polygon_from_array, simplify_polyline
+
+
+def test_polygon_from_array():
+    points = np.array([[0, 0], [1.5, -2], [1e6, .25]])
+    polygon = polygon_from_array(points)
+    assert [[point.x(), point.y()] for point in polygon] == points.tolist()
+    assert polygon_from_array(np.empty((0, 2))).isEmpty()
+
+
+def test_simplify_polyline_stays_within_tolerance():
+    angles = np.linspace(0, math.pi, 181)
+    points = np.stack((np.cos(angles), np.sin(angles)), axis=1) * 100
+    simplified = simplify_polyline(points, .5)
+    assert 3 < len(simplified) < 30
+    assert (simplified[0] == points[0]).all() and (simplified[-1] == points[-1]).all()
+    # the dropped vertices lie within tolerance of the chords around them
+    kept = [index for index, point in enumerate(points.tolist()) if point in simplified.tolist()]
+    for first, last in zip(kept, kept[1:]):
+        (x0, y0), (x1, y1) = points[first], points[last]
+        for x, y in points[first + 1:last]:
+            assert abs((x - x0) * (y1 - y0) - (y - y0) * (x1 - x0)) / math.hypot(x1 - x0, y1 - y0) <= .5
+    assert len(simplify_polyline(points[:2], .5)) == 2
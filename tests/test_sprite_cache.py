@@ -0,0 +1,46 @@
+import os
+
+import pytest
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QColor
+
+from SpriteCache import SpriteAtlas, SpriteDiskCache
+
+KEY = ("test", (0, 0, 10, 10), 1.0, 1000, 4)
+
+
+def fill_frame(painter, time: float) -> None:
+    painter.fillRect(QRectF(0, 0, 10, 10), QColor(int(time) % 256, 0, 0))
+
+
+@pytest.fixture
+def disk(tmp_path) -> SpriteDiskCache:
+    disk = SpriteDiskCache(str(tmp_path))
+    atlas = SpriteAtlas(QRectF(0, 0, 10, 10), 1.0, 1000, 4)
+    atlas.render_all(fill_frame)
+    disk.save(KEY, atlas)
+    return disk
+
+
+def test_saved_atlas_loads(app, disk):
+    atlas = disk.load(KEY)
+    assert atlas is not None
+    assert all(atlas.rendered)
+    assert atlas.image.pixelColor(atlas.tile_rect(1).topLeft().toPoint()) == QColor(250, 0, 0)
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: b"",
+    lambda data: b"garbage" * 10,
+    lambda data: data[:len(data) - 8],
+    lambda data: data[:40],
+    lambda data: data.replace(b'"height": 20', b'"height": 90'),
+])
+def test_unreadable_files_are_misses(app, disk, corrupt):
+    filename = disk.filename(KEY)
+    with open(filename, "rb") as file:
+        data = file.read()
+    with open(filename, "wb") as file:
+        file.write(corrupt(data))
+    assert disk.load(KEY) is None
+    assert not os.path.exists(filename)
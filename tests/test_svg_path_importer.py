@@ -0,0 +1,57 @@
+import pytest
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QPainterPath
+
+from SvgPathImporter import SvgPathImporter
+from conftest import assert_same_path
+
+
+def test_lines_and_closing():
+    expected = QPainterPath(QPointF(10, 10))
+    expected.lineTo(30, 10)
+    expected.lineTo(30, 30)
+    expected.lineTo(0, 30)
+    expected.lineTo(0, 0)
+    expected.closeSubpath()
+    # z goes back to the subpath start, a further pair after a moveto is an
+    # implicit lineto, relative after m
+    expected.moveTo(15, 15)
+    expected.lineTo(20, 15)
+    expected.lineTo(20, 25)
+    assert_same_path(SvgPathImporter.parse("M10,10 h20 v20 H0 V0 z m5,5 5,0 l0 10"), expected)
+
+
+def test_smooth_curves_reflect_the_previous_control_point():
+    expected = QPainterPath(QPointF(0, 0))
+    expected.cubicTo(0, 10, 10, 10, 10, 0)
+    expected.cubicTo(10, -10, 20, -10, 20, 0)
+    # without a previous cubic the first control point is the current point
+    expected.cubicTo(20, 0, 25, 5, 30, 0)
+    expected.quadTo(35, 10, 40, 0)
+    expected.quadTo(45, -10, 50, 0)
+    expected.quadTo(50, 0, 60, 0)
+    assert_same_path(SvgPathImporter.parse("M 0 0 C 0 10 10 10 10 0 S 20 -10 20 0 L 20 0 s 5 5 10 0 "
+                                           "Q 35 10 40 0 T 50 0 L 50 0 t 10 0"), expected)
+
+
+def test_relative_commands():
+    assert_same_path(SvgPathImporter.parse("m 10 10 l 10 0 c 0 10 10 10 10 0 q 5 5 10 0 z l 5 5"),
+                     SvgPathImporter.parse("M 10 10 L 20 10 C 20 20 30 20 30 10 Q 35 15 40 10 Z L 15 15"))
+
+
+def test_tokens_without_separators():
+    assert_same_path(SvgPathImporter.parse("M.5-1.5L1e1,2.5-3 4"), SvgPathImporter.parse("M 0.5 -1.5 L 10 2.5 L -3 4"))
+
+
+@pytest.mark.parametrize("data", ["10 10", "M 10", "M 0 0 L 1 1 C 2 2 3 3", "M 0 0 A 5 5 0 0 1 10 10",
+                                  "M 0 0 Z 5 5", "M 0 0 L 1 L 2 2"])
+def test_invalid_data_raises(data):
+    with pytest.raises(ValueError):
+        SvgPathImporter.parse(data)
+
+
+def test_prepare_is_memoized_on_tokens():
+    importer = SvgPathImporter()
+    prepared_path = importer.prepare("M 0 0 L 10 0")
+    assert importer.prepare("M0,0L10,0") is prepared_path
+    assert importer.stats() == {"hits": 1, "misses": 1, "size": 1}
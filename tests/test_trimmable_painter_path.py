@@ -0,0 +1,124 @@
+import gc
+
+import numpy as np
+import pytest
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QPainterPath
+
+from SvgPathImporter import SvgPathImporter
+from TrimmablePainterPath import (IncrementalTrimmer, PreparedPainterPath, TrimCache, load_prepared_paths,
+                                  save_prepared_paths)
+from conftest import assert_same_path, elements
+
+# an open path of two subpaths with lines, cubics and a quadratic curve
+OPEN_PATH_DATA = "M 0 0 L 100 0 C 150 0 150 100 100 100 Q 50 150 0 100 M 20 20 L 80 20 C 90 40 70 60 50 50"
+RANGES = [(0, 1), (.1, .35), (.5, .5), (.34, .36), (.9, 1), (0, .01), (.8, .2), (.99, .01), (1, 0)]
+
+
+def test_plain_paths_are_fingerprinted_once_per_object():
+    cache = TrimCache()
+    path = QPainterPath(QPointF(0, 0))
+    path.lineTo(100, 0)
+    assert cache.trim(path, 0, .5).currentPosition() == QPointF(50, 0)
+    key = cache.path_key(path)
+    assert cache.path_keys[id(path)][1] is key
+    # growing the path changes its element count, and so its key
+    path.lineTo(100, 100)
+    assert cache.trim(path, 0, .5).currentPosition() == QPointF(100, 0)
+    assert cache.path_key(path) != key
+    del path
+    gc.collect()
+    assert cache.path_keys == {}
+
+
+def test_trim_many_matches_trim():
+    prepared_path = PreparedPainterPath(SvgPathImporter.parse(OPEN_PATH_DATA))
+    for path, (start, end) in zip(prepared_path.trim_many(RANGES), RANGES):
+        assert_same_path(path, prepared_path.trim(start, end))
+    merged = QPainterPath()
+    for start, end in RANGES:
+        merged.addPath(prepared_path.trim(start, end))
+    assert_same_path(prepared_path.trim_many(RANGES, merge=True), merged)
+    with pytest.raises(ValueError):
+        prepared_path.trim_many([(0, 1.5)])
+
+
+def test_wrapping_window_on_a_closed_path_is_one_subpath():
+    prepared_path = PreparedPainterPath(SvgPathImporter.parse("M 0 0 L 100 0 L 100 100 L 0 100 Z"))
+    assert prepared_path.closed
+    trimmed_path = prepared_path.trim(.75, .25)
+    expected = QPainterPath(QPointF(0, 100))
+    expected.lineTo(0, 0)
+    expected.lineTo(100, 0)
+    assert_same_path(trimmed_path, expected)
+
+
+def test_wrapping_window_on_an_open_path_restarts_at_its_start():
+    prepared_path = PreparedPainterPath(SvgPathImporter.parse("M 0 0 L 100 0 L 100 100"))
+    assert not prepared_path.closed
+    expected = QPainterPath(QPointF(100, 50))
+    expected.lineTo(100, 100)
+    expected.moveTo(0, 0)
+    expected.lineTo(50, 0)
+    assert_same_path(prepared_path.trim(.75, .25), expected)
+
+
+def test_wrapping_windows_apply_to_each_subpath_individually():
+    prepared_path = PreparedPainterPath(SvgPathImporter.parse(
+        "M 0 0 L 100 0 L 100 100 L 0 100 Z M 200 0 L 300 0"))
+    expected = QPainterPath(QPointF(0, 100))
+    expected.lineTo(0, 0)
+    expected.lineTo(100, 0)
+    expected.moveTo(275, 0)
+    expected.lineTo(300, 0)
+    expected.moveTo(200, 0)
+    expected.lineTo(225, 0)
+    assert_same_path(prepared_path.trim(.75, .25, individually=True), expected)
+
+
+def test_incremental_trim_matches_full_trim():
+    prepared_path = PreparedPainterPath(SvgPathImporter.parse(OPEN_PATH_DATA))
+    trimmer = IncrementalTrimmer(prepared_path)
+    # a window half the path long moving forward, like GitHubAnimation's,
+    # then jumping back to the start
+    times = np.arange(0, 1.5, .013).tolist() + [.2, .3]
+    for time in times:
+        start, end = max(0.0, time - .5), min(time, 1.0)
+        assert_same_path(trimmer.trim(start, end), prepared_path.trim(start, end))
+
+
+def test_prepared_paths_round_trip_through_a_file(tmp_path):
+    filename = str(tmp_path / "paths.bin")
+    paths = {
+        "open": PreparedPainterPath(SvgPathImporter.parse(OPEN_PATH_DATA)),
+        "closed": PreparedPainterPath(SvgPathImporter.parse("M 0 0 L 100 0 L 100 100 L 0 100 Z")),
+        "empty": PreparedPainterPath(QPainterPath()),
+    }
+    save_prepared_paths(filename, paths)
+    loaded = load_prepared_paths(filename)
+    assert list(loaded) == list(paths)
+    for name, prepared_path in paths.items():
+        loaded_path = loaded[name]
+        assert loaded_path.fingerprint == prepared_path.fingerprint
+        assert loaded_path.element_count == prepared_path.element_count
+        assert loaded_path.closed == prepared_path.closed
+        assert loaded_path.subpaths == prepared_path.subpaths
+        assert list(loaded_path.types) == prepared_path.types
+        assert list(loaded_path.starts_subpath) == prepared_path.starts_subpath
+        # coordinates and lengths are stored as float32
+        assert np.allclose(list(loaded_path.cumulative), prepared_path.cumulative, rtol=1e-6)
+        for start, end in RANGES:
+            actual, expected = elements(loaded_path.trim(start, end)), elements(prepared_path.trim(start, end))
+            assert [element[0] for element in actual] == [element[0] for element in expected]
+            assert np.allclose([element[1:] for element in actual], [element[1:] for element in expected], atol=1e-3)
+    assert loaded["empty"].segment_count() == 0
+    assert loaded["empty"].trim(0, 1).isEmpty()
+    # the cache keys of loaded paths are those of the paths they were saved from
+    assert TrimCache().path_key(loaded["open"]) == TrimCache().path_key(paths["open"].path)
+
+
+def test_loading_another_file_fails(tmp_path):
+    filename = tmp_path / "paths.bin"
+    filename.write_bytes(b"garbage" * 10)
+    with pytest.raises(ValueError):
+        load_prepared_paths(str(filename))